@@ -0,0 +1,99 @@
+"""
+响应解析微基准
+
+对比 APIClient._handle_response 旧路径与单次解析路径在大体积
+jx3_jiaoyihang / jx3_zhuangtai 响应上的耗时：
+
+- 旧路径：bytes -> str -> json.loads，并无条件格式化 f"响应数据: {data}"
+- 新路径：bytes -> json_loads (orjson 可用时使用 orjson)，日志惰性格式化
+
+运行方式 (插件根目录下)：
+    python benchmarks/bench_json_decode.py
+    python benchmarks/bench_json_decode.py --rows 2000 --repeat 50
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.json_codec import json_loads, JSON_BACKEND  # noqa: E402
+
+
+def make_jiaoyihang(rows: int) -> dict:
+    """模拟交易行接口：每个物品带若干条在售记录"""
+    rng = random.Random(1)
+    data = []
+    for i in range(rows):
+        data.append({
+            "name": f"测试物品{i}",
+            "icon": rng.randint(1000, 30000),
+            "data": [
+                {
+                    "server": "梦江南",
+                    "unit_price": rng.randint(10000, 900000000),
+                    "created": 1700000000 + rng.randint(0, 86400 * 7),
+                    "count": rng.randint(1, 50),
+                }
+                for _ in range(rng.randint(1, 20))
+            ],
+        })
+    return {"code": 200, "msg": "success", "data": data}
+
+
+def make_zhuangtai(rows: int) -> dict:
+    """模拟区服状态接口"""
+    zones = ["电信区", "双线区", "无界区"]
+    status = ["正常", "繁忙", "爆满", "维护"]
+    rng = random.Random(2)
+    data = [
+        {"zone": rng.choice(zones), "server": f"服务器{i}", "status": rng.choice(status)}
+        for i in range(rows)
+    ]
+    return {"code": 200, "msg": "success", "data": data}
+
+
+def legacy_decode(body: bytes):
+    text = body.decode("utf-8")
+    data = json.loads(text)
+    _ = f"响应数据: {data}"
+    return data
+
+
+def fast_decode(body: bytes):
+    return json_loads(body)
+
+
+def bench(func, body: bytes, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(body)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应解析微基准")
+    parser.add_argument("--rows", type=int, default=1000, help="每个响应的数据行数")
+    parser.add_argument("--repeat", type=int, default=30, help="每种解析方式的重复次数")
+    args = parser.parse_args()
+
+    print(f"JSON 后端：{JSON_BACKEND}")
+    print(f"{'接口':<16}{'大小(KB)':>10}{'旧路径 p50(ms)':>16}{'新路径 p50(ms)':>16}{'提升':>8}")
+
+    for name, factory in (("jx3_jiaoyihang", make_jiaoyihang), ("jx3_zhuangtai", make_zhuangtai)):
+        body = json.dumps(factory(args.rows), ensure_ascii=False).encode("utf-8")
+        assert legacy_decode(body) == fast_decode(body)
+
+        old = statistics.median(bench(legacy_decode, body, args.repeat))
+        new = statistics.median(bench(fast_decode, body, args.repeat))
+        print(f"{name:<16}{len(body) / 1024:>10.1f}{old:>16.2f}{new:>16.2f}{old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+模板渲染基准
+
+用合成数据模拟各接口的上游响应，调用真实的 JX3Service 业务方法完成数据整理，
+再用本地 jinja2 代替文转图服务生成 HTML，统计：
+
+- 数据整理 + HTML 生成的总耗时 p50 / p95
+- 生成的 HTML 大小 (即提交给文转图服务的页面大小)
+
+全程不联网：_base_request 被替换为返回合成数据，图片缓存与接口缓存均关闭。
+需在安装了 AstrBot 的环境中运行 (业务模块依赖其日志与数据目录接口)。
+
+运行方式 (插件根目录下)：
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --rows 10 100 1000 --repeat 20
+    python benchmarks/bench_render.py --no-limit    # 忽略 api_config.json 中的 row_limit
+"""
+import sys
+import copy
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import jinja2  # noqa: E402
+
+from core.jx3_service import JX3Service  # noqa: E402
+from core.template_registry import templates  # noqa: E402
+
+
+BASE_TS = 1700000000
+SERVERS = ["梦江南", "唯我独尊", "乾坤一掷", "幽月轮", "斗转星移"]
+CAMPS = ["浩气盟", "恶人谷"]
+
+
+def make_jiaoyihang(rows: int, rng: random.Random) -> list:
+    return [
+        {
+            "name": f"测试物品{i}",
+            "icon": rng.randint(1000, 30000),
+            "data": [
+                {
+                    "server": rng.choice(SERVERS),
+                    "unit_price": rng.randint(10000, 900000000),
+                    "created": BASE_TS + rng.randint(0, 86400 * 7),
+                }
+                for _ in range(rng.randint(1, 5))
+            ],
+        }
+        for i in range(rows)
+    ]
+
+
+def make_qiyu(rows: int, rng: random.Random) -> list:
+    return [
+        {
+            "adventureName": "阴阳两界",
+            "gameName": f"角色{i}",
+            "time": (BASE_TS + rng.randint(0, 86400 * 30)) * 1000,
+        }
+        for i in range(rows)
+    ]
+
+
+def make_zhengyingpaimai(rows: int, rng: random.Random) -> list:
+    return [
+        {
+            "server": rng.choice(SERVERS),
+            "name": "玄晶",
+            "role_name": f"角色{i}",
+            "camp_name": rng.choice(CAMPS),
+            "amount": rng.randint(1000, 2000000),
+            "time": BASE_TS + rng.randint(0, 86400 * 30),
+        }
+        for i in range(rows)
+    ]
+
+
+def make_yanhuachaxun(rows: int, rng: random.Random) -> list:
+    return [
+        {
+            "server": rng.choice(SERVERS),
+            "name": "烟花",
+            "map_name": "稻香村",
+            "sender": f"角色{i}",
+            "receive": f"角色{rng.randint(0, rows)}",
+            "time": BASE_TS + rng.randint(0, 86400 * 30),
+        }
+        for i in range(rows)
+    ]
+
+
+def make_dilujilu(rows: int, rng: random.Random) -> list:
+    return [
+        {
+            "server": rng.choice(SERVERS),
+            "refresh_time": BASE_TS + i * 3600,
+            "capture_time": BASE_TS + i * 3600 + 600,
+            "capture_role_name": f"角色{i}",
+            "capture_camp_name": rng.choice(CAMPS),
+            "auction_time": BASE_TS + i * 3600 + 1800,
+            "auction_amount": rng.randint(10000, 900000),
+            "auction_role_name": f"角色{rng.randint(0, rows)}",
+            "auction_camp_name": rng.choice(CAMPS),
+        }
+        for i in range(rows)
+    ]
+
+
+def make_zhuangtai(rows: int, rng: random.Random) -> list:
+    zones = ["电信区", "双线区", "无界区"]
+    status = ["正常", "维护", "爆满", "拥挤", "顺畅"]
+    return [
+        {"zone": rng.choice(zones), "server": f"服务器{i}", "status": rng.choice(status)}
+        for i in range(rows)
+    ]
+
+
+# 业务方法, 接口配置名, 合成数据, 调用参数
+CASES = [
+    ("jiaoyihang", "jx3_jiaoyihang", make_jiaoyihang, ("守缺式", "梦江南")),
+    ("qiyu", "aijx3_qiyu", make_qiyu, ("阴阳两界", "梦江南")),
+    ("zhengyingpaimai", "jx3_zhengyingpaimai", make_zhengyingpaimai, ("梦江南", "玄晶")),
+    ("yanhuachaxun", "jx3_yanhuachaxun", make_yanhuachaxun, ("梦江南", "角色0")),
+    ("dilujilu", "jx3_dilujilu", make_dilujilu, ("梦江南",)),
+    ("zhuangtai", "jx3_zhuangtai", make_zhuangtai, ()),
+]
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def bench_case(service: JX3Service, env: jinja2.Environment, method: str, args: tuple, repeat: int):
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await getattr(service, method)(*args)
+        if result["code"] != 200:
+            raise RuntimeError(f"{method} 返回失败: {result['msg']}")
+        # 与文转图服务一样，每次都从模板字符串编译
+        html = env.from_string(result["temp"]).render(**result["data"])
+        samples.append((time.perf_counter() - start) * 1000)
+        size = len(html.encode("utf-8"))
+    return samples, size
+
+
+async def run(args):
+    api_config = json.loads((ROOT / "data" / "api_config.json").read_text(encoding="utf-8"))
+    if args.no_limit:
+        for conf in api_config.values():
+            conf.pop("row_limit", None)
+
+    config = {
+        "jx3api_token": "bench",
+        "cache": {"enable": False},
+        "image_cache": {"enable": False},
+        "rate_limit": {"enable": False},
+        "breaker": {"enable": False},
+    }
+    templates.build = not args.no_build
+    templates.load_all()
+
+    service = JX3Service(api_config, config)
+    fixtures = {}
+
+    async def fake_request(config_key, method, params=None, **kwargs):
+        return copy.deepcopy(fixtures[config_key])
+
+    service._base_request = fake_request
+    env = jinja2.Environment()
+
+    print(f"{'接口':<18}{'行数':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'HTML(KB)':>10}")
+    try:
+        for method, config_key, factory, call_args in CASES:
+            for rows in args.rows:
+                fixtures[config_key] = factory(rows, random.Random(rows))
+                samples, size = await bench_case(service, env, method, call_args, args.repeat)
+                print(
+                    f"{method:<18}{rows:>6}{statistics.median(samples):>10.2f}"
+                    f"{percentile(samples, 95):>10.2f}{size / 1024:>10.1f}"
+                )
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模板渲染基准")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000], help="合成数据行数")
+    parser.add_argument("--repeat", type=int, default=20, help="每组重复次数")
+    parser.add_argument("--no-limit", action="store_true", help="忽略接口配置中的 row_limit")
+    parser.add_argument("--no-build", action="store_true", help="使用未压缩的原始模板")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
+import time
 import asyncio
-import json
-import aiofiles
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
 
 from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult, MessageChain
 from astrbot.api.star import Context, Star, register, StarTools
@@ -11,6 +13,8 @@ from astrbot.api import logger
 from astrbot.api import AstrBotConfig
 
 from .jx3_service import JX3Service
+from .rate_limit import RateLimitExceeded
+from .state_store import JsonStateStore, SqliteStateStore
 
 
 class AsyncTask:
@@ -23,55 +27,47 @@ class AsyncTask:
         self.conf = config
         self.jx3fun = jx3fun
         
-        self.file_path = StarTools.get_data_dir("astrbot_plugin_jx3") / "local_async.json"
-        self._file_lock = asyncio.Lock()
+        data_dir = StarTools.get_data_dir("astrbot_plugin_jx3")
+        self.file_path = data_dir / "local_async.json"
+        # 监控状态保存在内存中，变化后延迟批量写入文件
+        if config.get("state_store", "json") == "sqlite":
+            # SQLite 额外保存状态转换历史，首次启动时从 JSON 文件迁移
+            self.store = SqliteStateStore(
+                data_dir / "state.db",
+                json_path=self.file_path,
+                history_limit=config.get("state_history_limit", 100)
+            )
+            self.file_path = self.store.db_path
+        else:
+            self.store = JsonStateStore(self.file_path)
         
         self.scheduler = AsyncIOScheduler()
         self.tasks = {}  # 存储 task_id 对应的状态信息
+
+        # 推送并发上限与单次发送超时
+        push_conf = config.get("push", {})
+        self.push_timeout = push_conf.get("timeout", 10)
+        self._push_sem = asyncio.Semaphore(max(1, push_conf.get("concurrency", 8)))
+        # task_key -> 推送统计
+        self.push_stats: Dict[str, Dict[str, Any]] = {}
+
+        # 自适应轮询：维护中或处于维护时间窗内加快，状态稳定时逐步放慢
+        adaptive_conf = config.get("adaptive_poll", {})
+        self.adaptive = adaptive_conf.get("enable", False)
+        self.min_interval = max(5, adaptive_conf.get("min_interval", 20))
+        self.max_interval = max(self.min_interval, adaptive_conf.get("max_interval", 600))
+        self.backoff = max(1.0, adaptive_conf.get("backoff", 2.0))
+        self.windows = self._parse_windows(adaptive_conf.get("windows", []))
         
         logger.info(f"获取后台数据缓存文件路径成功：{self.file_path}")
 
     """===================== 本地读写 ====================="""
 
     async def set_local_data(self, key: str, value):
-        async with self._file_lock:
-            try:
-                self.file_path.parent.mkdir(parents=True, exist_ok=True)
-
-                if not self.file_path.exists():
-                    local_data = {}
-                else:
-                    async with aiofiles.open(self.file_path, "r", encoding="utf-8") as f:
-                        content = await f.read()
-                        local_data = json.loads(content) if content else {}
-
-                local_data[key] = value
-
-                async with aiofiles.open(self.file_path, "w", encoding="utf-8") as f:
-                    await f.write(
-                        json.dumps(local_data, ensure_ascii=False, indent=4)
-                    )
-
-            except (OSError, json.JSONDecodeError) as e:
-                logger.error(f"数据写入文件失败：{e}")
+        self.store.set(key, value)
 
     async def get_local_data(self, key: str, default=None):
-        async with self._file_lock:
-            try:
-                if not self.file_path.exists():
-                    return default
-
-                async with aiofiles.open(self.file_path, "r", encoding="utf-8") as f:
-                    content = await f.read()
-                    if not content:
-                        return default
-                    local_data = json.loads(content)
-
-                return local_data.get(key, default)
-
-            except (OSError, json.JSONDecodeError) as e:
-                logger.error(f"读取数据文件失败：{e}")
-                return default
+        return self.store.get(key, default)
 
     """===================== 通用后台任务 ====================="""
 
@@ -83,64 +79,277 @@ class AsyncTask:
 
             if not isinstance(data, dict):
                 raise ValueError("fetch_func 返回数据不是 dict")
+            if data.get("code") != 200:
+                # 请求失败 (含熔断期间) 不视为状态变化
+                logger.warning(f"{namefun} 获取状态失败：{data.get('msg')}")
+                return
 
             state["state_new"] = data.get("status")
 
-            if state["state_old"] != state["state_new"]:
+            changed = state["state_old"] != state["state_new"]
+            if changed:
                 message_chain = MessageChain().message(data.get("data"))
+                await self._broadcast(task_key, state["umos"], message_chain)
 
-                for umo in state["umos"]:
-                    await self.context.send_message(umo, message_chain)
-
-                await self.set_local_data(task_key, state["state_new"])
+                if state["cursor"]:
+                    self.store.set_cursor(task_key, state["state_new"])
+                else:
+                    await self.set_local_data(task_key, state["state_new"])
                 state["state_old"] = state["state_new"]
 
+            self._adapt_interval(task_key, changed)
+
         except asyncio.CancelledError:
             # 调度器 shutdown 时的正常路径
             raise
 
+        except RateLimitExceeded:
+            logger.warning(f"{namefun} 请求被限流，等待下个周期")
+
         except (KeyError, TypeError, ValueError) as e:
             logger.error(f"{namefun} 数据结构异常: {e}")
 
         except Exception as e:
             logger.exception(f"{namefun} 后台任务执行异常")
 
+    async def _job_multi_server(self, fetch_func, task_key: str, namefun: str):
+        """
+        多服务器监控：一次请求取回全部服务器状态，逐个服务器比较，
+        只推送给订阅了该服务器的会话。首次观测到的服务器只记录状态不推送。
+        """
+        servers = self.tasks[task_key]["servers"]
+
+        try:
+            data = await fetch_func()
+
+            if not isinstance(data, dict):
+                raise ValueError("fetch_func 返回数据不是 dict")
+            if data.get("code") != 200:
+                logger.warning(f"{namefun} 获取状态失败：{data.get('msg')}")
+                return
+
+            changed = False
+            for server, sub in servers.items():
+                item = data["data"].get(server)
+                if item is None:
+                    if not sub.get("missing"):
+                        logger.warning(f"{namefun} 区服状态中未找到服务器：{server}")
+                        sub["missing"] = True
+                    continue
+
+                state_new = item["status"]
+                if sub["state_old"] == state_new:
+                    continue
+
+                if sub["state_old"] is not None:
+                    await self._broadcast(task_key, sub["umos"], MessageChain().message(item["data"]))
+
+                self.store.set(task_key, state_new, server=server)
+                sub["state_old"] = state_new
+                changed = True
+
+            self._adapt_interval(task_key, changed)
+
+        except asyncio.CancelledError:
+            raise
+
+        except RateLimitExceeded:
+            logger.warning(f"{namefun} 请求被限流，等待下个周期")
+
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"{namefun} 数据结构异常: {e}")
+
+        except Exception:
+            logger.exception(f"{namefun} 后台任务执行异常")
+
+    async def _send_one(self, umo: str, message_chain: MessageChain, start: float) -> Optional[float]:
+        """
+        发送到单个会话，失败互不影响
+        :return: 从开始推送到送达的耗时，失败返回 None
+        """
+        async with self._push_sem:
+            try:
+                await asyncio.wait_for(self.context.send_message(umo, message_chain), self.push_timeout)
+                return time.perf_counter() - start
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                logger.warning(f"推送到 {umo} 超时 ({self.push_timeout}s)")
+            except Exception as e:
+                logger.error(f"推送到 {umo} 失败：{e}")
+        return None
+
+    async def _broadcast(self, task_key: str, umos: List[str], message_chain: MessageChain):
+        """
+        并发推送到多个会话，并发数受 push.concurrency 限制，记录本次推送的送达耗时
+        """
+        if not umos:
+            return
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._send_one(umo, message_chain, start) for umo in umos))
+        latencies = [r for r in results if r is not None]
+
+        stats = self.push_stats.setdefault(
+            task_key, {"dispatches": 0, "delivered": 0, "failed": 0, "last_latency": 0.0, "avg_latency": 0.0}
+        )
+        latency = max(latencies) if latencies else time.perf_counter() - start
+        stats["avg_latency"] = latency if not stats["dispatches"] else stats["avg_latency"] * 0.8 + latency * 0.2
+        stats["last_latency"] = latency
+        stats["dispatches"] += 1
+        stats["delivered"] += len(latencies)
+        stats["failed"] += len(umos) - len(latencies)
+
+        logger.info(f"{task_key} 推送完成 {len(latencies)}/{len(umos)}，耗时 {latency:.2f}s")
+
+    """===================== 自适应轮询 ====================="""
+
+    @staticmethod
+    def _parse_windows(entries: List[str]) -> List[Tuple[Optional[int], int, int]]:
+        """
+        解析维护时间窗，格式 "[星期1-7] HH:MM-HH:MM"，如 "4 07:00-10:00"、"06:55-07:30"
+        :return: [(星期或 None, 开始分钟, 结束分钟)]
+        """
+        def to_minute(text: str) -> int:
+            hour, minute = text.split(":", 1)
+            return int(hour) * 60 + int(minute)
+
+        windows = []
+        for entry in entries:
+            try:
+                parts = entry.split()
+                weekday = int(parts[0]) if len(parts) == 2 else None
+                start, end = parts[-1].split("-", 1)
+                if weekday is not None and not 1 <= weekday <= 7:
+                    raise ValueError(weekday)
+                windows.append((weekday, to_minute(start), to_minute(end)))
+            except (ValueError, IndexError):
+                logger.warning(f"维护时间窗格式错误，应为 [星期] HH:MM-HH:MM：{entry}")
+        return windows
+
+    def _in_window(self, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        return any(
+            (weekday is None or weekday == now.isoweekday()) and start <= minute < end
+            for weekday, start, end in self.windows
+        )
+
+    def _in_maintenance(self, task_key: str) -> bool:
+        """开服监控中任一服务器处于维护状态"""
+        if task_key != "kfjk":
+            return False
+        t = self.tasks[task_key]
+        if "servers" in t:
+            return any(sub["state_old"] is False for sub in t["servers"].values())
+        return t["state_old"] is False
+
+    def _adapt_interval(self, task_key: str, changed: bool):
+        """
+        根据本次结果调整下次轮询间隔
+        1. 维护中或处于维护时间窗：最小间隔
+        2. 状态刚变化：恢复配置的周期
+        3. 状态稳定：按倍数退避，不超过最大间隔
+        """
+        if not self.adaptive or task_key not in self.tasks:
+            return
+        t = self.tasks[task_key]
+        current = t["current_interval"]
+
+        if self._in_maintenance(task_key) or self._in_window():
+            interval = self.min_interval
+        elif changed:
+            interval = t["interval"]
+        else:
+            interval = current * self.backoff
+        interval = int(min(max(interval, self.min_interval), self.max_interval))
+
+        if interval != current and self.scheduler.get_job(task_key):
+            self.scheduler.reschedule_job(task_key, trigger=IntervalTrigger(seconds=interval))
+            logger.debug(f"{task_key} 轮询间隔调整：{current}s -> {interval}s")
+        t["current_interval"] = interval
+
     """===================== 初始化任务 ====================="""
 
     async def init_tasks(self):
+        await self.store.load()
+
+        default_server = self.conf.get("server", "梦江南")
+        # 最后一个参数：是否按读取位置保存 (新闻只记录最后读到的一条，不记录状态历史)
+        # 监控跳过接口缓存，否则加快轮询也只会读到缓存中的旧数据
         settings = [
-            ("kfjk", "开服监控", lambda: self.jx3fun.kaifu("梦江南")),
-            ("xwzx", "新闻资讯", lambda: self.jx3fun.xinwen()),
+            ("kfjk", "开服监控", lambda: self.jx3fun.kaifu(default_server, fresh=True), False),
+            ("xwzx", "新闻资讯", lambda: self.jx3fun.xinwen(fresh=True), True),
         ]
 
-        for key, name, fetch in settings:
+        for key, name, fetch, cursor in settings:
             conf = self.conf.get(key, {})
 
-            state_old = await self.get_local_data(key, default=False)
+            if cursor:
+                # 兼容旧版本保存在监控状态中的值
+                state_old = self.store.get_cursor(key, default=self.store.get(key, default=False))
+            else:
+                state_old = await self.get_local_data(key, default=False)
             self.tasks[key] = {
                 "enable": conf.get("enable", True),
                 "interval": conf.get("time", 60),
                 "umos": conf.get("umos", []),
+                "cursor": cursor,
                 "state_old": state_old,
-                "state_new": state_old
+                "state_new": state_old,
+                "current_interval": conf.get("time", 60)
             }
 
+            job = self._job_common
+            if key == "kfjk" and conf.get("servers"):
+                # 配置了多服务器订阅时，改为一次区服状态请求监控全部服务器
+                servers = self._init_servers(key, default_server, conf)
+                fetch = lambda names=list(servers): self.jx3fun.kaifu_servers(names)
+                job = self._job_multi_server
+
             if self.tasks[key]["enable"]:
-                self._add_scheduler(key, name, fetch)
+                self._add_scheduler(key, name, fetch, job)
 
         if not self.scheduler.running:
             self.scheduler.start()
             logger.info("后台监控调度器已启动")
 
+    def _init_servers(self, key: str, default_server: str, conf: Dict) -> Dict[str, Dict]:
+        """
+        解析多服务器订阅，格式 "服务器|会话ID"；全局推送列表订阅默认服务器
+        """
+        servers: Dict[str, Dict] = {}
+
+        def subscribe(server: str, umo: str):
+            sub = servers.setdefault(server, {"umos": [], "state_old": self.store.get(key, server=server)})
+            if umo and umo not in sub["umos"]:
+                sub["umos"].append(umo)
+
+        for umo in conf.get("umos", []):
+            subscribe(default_server, umo)
+        for entry in conf.get("servers", []):
+            server, sep, umo = entry.partition("|")
+            if not sep or not server.strip() or not umo.strip():
+                logger.warning(f"多服务器订阅格式错误，应为 服务器|会话ID：{entry}")
+                continue
+            subscribe(server.strip(), umo.strip())
+
+        # 沿用单服务器模式下保存的默认服务器状态
+        if default_server in servers and servers[default_server]["state_old"] is None:
+            servers[default_server]["state_old"] = self.store.get(key)
+
+        self.tasks[key]["servers"] = servers
+        return servers
+
     """===================== 调度操作 ====================="""
 
-    def _add_scheduler(self, key, namefun, fetch_func):
+    def _add_scheduler(self, key, namefun, fetch_func, job=None):
         if self.scheduler.get_job(key):
             self.scheduler.remove_job(key)
 
         interval = self.tasks[key]["interval"]
         self.scheduler.add_job(
-            func=self._job_common,
+            func=job or self._job_common,
             trigger=IntervalTrigger(seconds=interval),
             id=key,
             args=[fetch_func, key, namefun]
@@ -148,6 +357,45 @@ class AsyncTask:
 
         logger.info(f"{namefun}后台任务启动成功，周期：{interval}s")
 
+    def add_prerender_job(self, func: Callable[[], Awaitable[None]], interval: int, reset_time: str = "07:00"):
+        """
+        注册预渲染任务：启动后立即执行一次，之后按周期执行，并在每日重置时间以 reset=True 额外执行
+        :param func: 预渲染函数，接受 reset 关键字参数
+        :param reset_time: 每日重置时间，格式 HH:MM，格式错误时使用 07:00
+        """
+        try:
+            hour, minute = (int(x) for x in reset_time.split(":", 1))
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError(reset_time)
+        except (ValueError, AttributeError):
+            logger.warning(f"每日重置时间格式错误，应为 HH:MM，使用 07:00：{reset_time}")
+            hour, minute, reset_time = 7, 0, "07:00"
+
+        for job_id in ("prerender", "prerender_reset"):
+            if self.scheduler.get_job(job_id):
+                self.scheduler.remove_job(job_id)
+
+        self.scheduler.add_job(
+            func=func,
+            trigger=IntervalTrigger(seconds=interval),
+            id="prerender",
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.add_job(
+            func=func,
+            trigger=CronTrigger(hour=hour, minute=minute),
+            id="prerender_reset",
+            kwargs={"reset": True},
+            max_instances=1,
+            coalesce=True
+        )
+
+        if not self.scheduler.running:
+            self.scheduler.start()
+        logger.info(f"预渲染任务启动成功，周期：{interval}s，每日 {reset_time} 重建")
+
     def stop_all_tasks(self):
         """
         停止并移除所有任务
@@ -166,19 +414,44 @@ class AsyncTask:
             if self.scheduler.running:
                 self.scheduler.shutdown(wait=False)
             self.tasks.clear()
+            await self.store.close()
             logger.info("后台调度器已销毁")
         except Exception as e:
             logger.error(f"销毁调度器失败：{e}")
 
+    def _interval_info(self, t: Dict) -> str:
+        if not self.adaptive:
+            return ""
+        return f"当前周期：{t['current_interval']} 秒 (自适应 {self.min_interval}-{self.max_interval} 秒)\n"
+
     async def get_task_info(self, key: str) -> str:
         try:
             t = self.tasks[key]
-            return (
+            info = (
                 f"功能：{key}\n"
                 f"启用：{t['enable']}\n"
                 f"周期：{t['interval']} 秒\n"
-                f"旧状态：{t['state_old']}\n"
-                f"推送对象：{t['umos']}"
+                f"{self._interval_info(t)}"
             )
+            # 多服务器模式下按服务器列出状态
+            if "servers" not in t:
+                info += f"旧状态：{t['state_old']}\n"
+            info += f"推送对象：{t['umos']}"
+            for server, sub in t.get("servers", {}).items():
+                info += f"\n{server}：{sub['state_old']}  推送 {len(sub['umos'])} 个会话"
+            p = self.push_stats.get(key)
+            if p:
+                info += (
+                    f"\n推送：{p['dispatches']} 次，送达 {p['delivered']}，失败 {p['failed']}，"
+                    f"最近耗时 {p['last_latency']:.2f}s，平均 {p['avg_latency']:.2f}s"
+                )
+            for server in t.get("servers") or [""]:
+                history = await self.store.history(key, server=server, limit=3)
+                if history:
+                    info += f"\n{server}最近变化：\n" + "\n".join(
+                        f"  {datetime.fromtimestamp(h['changed_at']):%m-%d %H:%M}  {h['old']} → {h['new']}"
+                        for h in history
+                    )
+            return info
         except Exception as e:
             return f"读取后台配置失败：{e}"
@@ -0,0 +1,145 @@
+import copy
+import json
+import time
+import hashlib
+import asyncio
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def make_cache_key(
+    config_key: str,
+    params: Optional[Dict[str, Any]] = None,
+    out_key: Optional[str] = None,
+    ignore: Tuple[str, ...] = ("token", "ticket")
+) -> str:
+    """
+    生成缓存键：接口键名 + 提取字段 + 规范化后的请求参数
+    token、ticket 等凭据字段不参与生成，避免泄漏到日志/内存快照中，也保证不同 token 共享同一份数据
+    """
+    normalized = {
+        str(k): str(v) for k, v in (params or {}).items() if k not in ignore
+    }
+    return f"{config_key}:{out_key or ''}:{json.dumps(normalized, ensure_ascii=False, sort_keys=True)}"
+
+
+def make_render_key(template: str, data: Any, volatile: Tuple[str, ...] = ("update_time",)) -> str:
+    """
+    生成渲染缓存键：模板内容摘要 + 渲染数据的稳定摘要
+    volatile 中的字段 (如查询时刻) 不参与计算，否则相同数据每次都会重新渲染
+    """
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in volatile}
+    data_json = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+    template_digest = hashlib.sha1(template.encode("utf-8")).hexdigest()
+    data_digest = hashlib.sha1(data_json.encode("utf-8")).hexdigest()
+    return f"{template_digest}:{data_digest}"
+
+
+class TTLCache:
+    """
+    进程内异步 TTL 缓存
+
+    1. 每个条目单独设置过期时间。
+    2. 基于 OrderedDict 的 LRU 淘汰，条目数受 max_size 限制。
+    3. 记录命中/未命中次数，便于观察缓存效果。
+    4. 读写时深拷贝，业务函数对返回数据的原地修改不会污染缓存。
+    5. 过期后可在 stale_ttl 内继续保留旧数据，用于 stale-while-revalidate。
+    6. 因容量被淘汰时调用 on_evict(key)，便于同步清理与缓存键关联的其他数据。
+    """
+
+    def __init__(self, max_size: int = 256, on_evict: Optional[Callable[[str], None]] = None):
+        self.max_size = max(1, int(max_size))
+        self.on_evict = on_evict
+        # key -> (新鲜截止时间, 陈旧截止时间, 数据)
+        self._data: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        """获取未过期的缓存数据，不存在或已过期返回 None"""
+        entry = await self.get_entry(key, allow_stale=False)
+        return entry[0] if entry else None
+
+    async def get_entry(self, key: str, allow_stale: bool = True) -> Optional[Tuple[Any, bool]]:
+        """
+        获取缓存数据及其新鲜度
+        :return: (数据, 是否新鲜)，不存在或超过最大陈旧时间返回 None
+        """
+        async with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            fresh_until, stale_until, value = entry
+            now = time.monotonic()
+            if stale_until <= now:
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            fresh = fresh_until > now
+            if not fresh and not allow_stale:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return copy.deepcopy(value), fresh
+
+    async def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0):
+        """写入缓存，ttl 单位秒，<=0 时不缓存；stale_ttl 为过期后继续保留的秒数"""
+        if ttl <= 0 or value is None:
+            return
+
+        now = time.monotonic()
+        async with self._lock:
+            self._data[key] = (now + ttl, now + ttl + max(0, stale_ttl), copy.deepcopy(value))
+            self._data.move_to_end(key)
+            self._trim()
+
+    async def restore(self, key: str, value: Any, fresh_for: float, stale_for: float):
+        """
+        恢复持久化的条目 (如插件重启后预热)
+        :param fresh_for: 剩余新鲜时间，<=0 表示已过期但仍可作为旧数据使用
+        :param stale_for: 剩余可用时间 (含新鲜时间)，<=0 时不恢复
+        """
+        if stale_for <= 0 or value is None:
+            return
+
+        now = time.monotonic()
+        async with self._lock:
+            self._data[key] = (now + fresh_for, now + stale_for, copy.deepcopy(value))
+            self._data.move_to_end(key)
+            self._trim()
+
+    def _trim(self):
+        """按 LRU 淘汰超出容量的条目，调用方需持有锁"""
+        while len(self._data) > self.max_size:
+            key, _ = self._data.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(key)
+
+    async def clear(self):
+        async with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / total, 4) if total else 0.0,
+        }
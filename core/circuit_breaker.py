@@ -0,0 +1,70 @@
+import time
+from typing import Dict, Any
+
+
+class CircuitBreaker:
+    """
+    按键 (接口 config_key) 划分的熔断器
+
+    1. closed：正常放行，连续失败达到 failure_threshold 次后进入 open。
+    2. open：直接拒绝请求，cooldown 秒后进入 half_open。
+    3. half_open：只放行一个探测请求，成功则恢复 closed，失败则重新 open；
+       探测请求超过 cooldown 仍无结果 (例如被限流丢弃) 时允许重新探测。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30):
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.cooldown = max(float(cooldown), 0)
+        self._states: Dict[str, Dict[str, Any]] = {}
+
+    def _state(self, key: str) -> Dict[str, Any]:
+        state = self._states.get(key)
+        if state is None:
+            state = {"state": self.CLOSED, "failures": 0, "opened_at": 0.0, "probe_at": None}
+            self._states[key] = state
+        return state
+
+    def allow(self, key: str) -> bool:
+        """当前是否允许向该接口发起请求"""
+        state = self._state(key)
+
+        if state["state"] == self.OPEN:
+            if time.monotonic() - state["opened_at"] < self.cooldown:
+                return False
+            state["state"] = self.HALF_OPEN
+            state["probe_at"] = None
+
+        if state["state"] == self.HALF_OPEN:
+            now = time.monotonic()
+            if state["probe_at"] is not None and now - state["probe_at"] < self.cooldown:
+                return False
+            state["probe_at"] = now
+
+        return True
+
+    def record_success(self, key: str):
+        state = self._state(key)
+        state.update(state=self.CLOSED, failures=0, probe_at=None)
+
+    def record_failure(self, key: str):
+        state = self._state(key)
+        state["failures"] += 1
+        state["probe_at"] = None
+        if state["state"] == self.HALF_OPEN or state["failures"] >= self.failure_threshold:
+            state["state"] = self.OPEN
+            state["opened_at"] = time.monotonic()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各接口熔断状态，open 状态附带剩余冷却时间"""
+        now = time.monotonic()
+        result = {}
+        for key, state in self._states.items():
+            info = {"state": state["state"], "failures": state["failures"]}
+            if state["state"] == self.OPEN:
+                info["retry_in"] = max(0.0, round(self.cooldown - (now - state["opened_at"]), 1))
+            result[key] = info
+        return result
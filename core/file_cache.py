@@ -0,0 +1,380 @@
+import os
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import mimetypes
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from astrbot.api import logger
+
+
+class FileCache:
+    """
+    按内容寻址的本地文件缓存
+
+    1. 文件以 sha256 命名存放在 root/<前两位>/ 下，相同内容只存一份。
+    2. 索引记录 URL -> 文件的映射，保存在 root/index.json。
+    3. 总字节数超过 max_bytes 时按最近最少使用淘汰。
+    4. 下载以流式写入临时文件，超过单文件大小上限立即中止。
+    5. 小图片可转为 data URI 供模板直接内嵌，转换结果在内存中按总字节数做 LRU。
+    6. 条目超过 max_age 后重新下载 (同一 URL 重新发布的图片不会一直使用旧文件)，下载失败时继续使用旧文件。
+    7. 下载失败的 URL 在 failure_ttl 内直接返回失败，不重复请求。
+    8. 索引在线程池中读写，修改后延迟 save_delay 秒合并写入。
+    9. 命中只查内存索引不访问磁盘；移入、删除文件等磁盘操作都在线程池中执行。
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 200 * 1024 * 1024,
+        max_file_bytes: int = 10 * 1024 * 1024,
+        max_inline_bytes: int = 256 * 1024,
+        max_memory_bytes: int = 8 * 1024 * 1024,
+        max_age: float = 24 * 3600,
+        failure_ttl: float = 300,
+        save_delay: float = 5.0
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.max_inline_bytes = max_inline_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_age = max_age
+        self.failure_ttl = failure_ttl
+        self.save_delay = save_delay
+        self._index_path = self.root / "index.json"
+        # url -> {"hash", "ext", "size", "atime", "hits", "fetched"}
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._downloading: Dict[str, asyncio.Task] = {}
+        # url -> data URI
+        self._data_uris: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        # url -> 失败记录过期时间
+        self._failures: Dict[str, float] = {}
+        self._save_timer: Optional[asyncio.Task] = None
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    """===================== 索引 ====================="""
+
+    def _load_index_sync(self) -> Dict[str, Dict[str, Any]]:
+        index: Dict[str, Dict[str, Any]] = {}
+        try:
+            if self._index_path.exists():
+                with open(self._index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"读取图片缓存索引失败，将重建：{e}")
+            return {}
+
+        now = time.time()
+        result = {}
+        for url, meta in index.items():
+            # 丢弃文件已不存在的条目
+            if not self._blob_path(meta["hash"], meta.get("ext", "")).exists():
+                continue
+            # 旧版本索引没有下载时间，从加载时开始计算
+            meta.setdefault("fetched", now)
+            result[url] = meta
+        return result
+
+    async def load(self):
+        """在线程池中读取索引"""
+        loop = asyncio.get_running_loop()
+        self._index = await loop.run_in_executor(None, self._load_index_sync)
+        self._loaded = True
+
+    def _save_index_sync(self, index: Dict[str, Dict[str, Any]]):
+        """原子写入索引文件"""
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp_path, self._index_path)
+        except OSError as e:
+            logger.error(f"写入图片缓存索引失败：{e}")
+
+    async def save_index(self):
+        """立即写入索引，写入内容在事件循环中复制，避免写入期间被修改"""
+        if self._save_timer and not self._save_timer.done() and self._save_timer is not asyncio.current_task():
+            self._save_timer.cancel()
+        self._save_timer = None
+        # 尚未读取索引时写入会覆盖已有索引
+        if not self._loaded:
+            return
+        snapshot = {url: dict(meta) for url, meta in self._index.items()}
+        await asyncio.get_running_loop().run_in_executor(None, self._save_index_sync, snapshot)
+
+    def _schedule_save(self):
+        """延迟合并写入索引"""
+        if self._save_timer is None or self._save_timer.done():
+            self._save_timer = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        await self.save_index()
+
+    async def close(self):
+        """取消延迟写入并立即保存索引"""
+        await self.save_index()
+
+    def _blob_path(self, digest: str, ext: str) -> Path:
+        return self.root / digest[:2] / f"{digest}{ext}"
+
+    @property
+    def total_bytes(self) -> int:
+        # 相同内容只计算一次
+        blobs = {meta["hash"]: meta["size"] for meta in self._index.values()}
+        return sum(blobs.values())
+
+    """===================== 读写 ====================="""
+
+    def _expired(self, meta: Dict[str, Any]) -> bool:
+        return self.max_age > 0 and time.time() - meta.get("fetched", 0) > self.max_age
+
+    def lookup(self, url: str, allow_expired: bool = False) -> Optional[Path]:
+        """
+        查询已缓存的文件路径，并刷新访问时间
+        只查内存索引，文件在缓存外被删除时由读取方调用 forget 丢弃条目
+        :param allow_expired: 为 True 时超过 max_age 的条目也返回
+        """
+        meta = self._index.get(url)
+        if meta is None or (not allow_expired and self._expired(meta)):
+            return None
+
+        meta["atime"] = time.time()
+        meta["hits"] = meta.get("hits", 0) + 1
+        return self._blob_path(meta["hash"], meta.get("ext", ""))
+
+    def forget(self, url: str):
+        """丢弃文件已丢失的条目，下次访问时重新下载"""
+        self._index.pop(url, None)
+        self._drop_data_uri(url)
+        self._schedule_save()
+
+    async def fetch(self, url: str, api_client) -> Optional[Path]:
+        """
+        获取 URL 对应的本地文件，未缓存时流式下载
+        :param api_client: 提供 download(url, dest, max_bytes) 的 APIClient
+        :return: 本地文件路径，下载失败或超过大小上限返回 None
+        """
+        if not url:
+            return None
+
+        path = self.lookup(url)
+        if path is not None:
+            self.hits += 1
+            return path
+
+        self.misses += 1
+        failed_until = self._failures.get(url)
+        if failed_until is not None:
+            if failed_until > time.monotonic():
+                return self.lookup(url, allow_expired=True)
+            del self._failures[url]
+
+        # 同一 URL 并发请求只下载一次
+        task = self._downloading.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._download(url, api_client))
+            self._downloading[url] = task
+            task.add_done_callback(lambda _: self._downloading.pop(url, None))
+        path = await asyncio.shield(task)
+        if path is None:
+            # 重新下载失败时继续使用过期的旧文件
+            return self.lookup(url, allow_expired=True)
+        return path
+
+    def _remember_failure(self, url: str):
+        """记录下载失败的 URL，失败记录数量有上限"""
+        if self.failure_ttl <= 0:
+            return
+        now = time.monotonic()
+        self._failures.pop(url, None)
+        self._failures[url] = now + self.failure_ttl
+        if len(self._failures) > 1024:
+            self._failures = {u: t for u, t in self._failures.items() if t > now}
+            while len(self._failures) > 1024:
+                del self._failures[next(iter(self._failures))]
+
+    async def _download(self, url: str, api_client) -> Optional[Path]:
+        tmp_dir = self.root / "tmp"
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: tmp_dir.mkdir(parents=True, exist_ok=True))
+        tmp_path = tmp_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.part"
+
+        result = await api_client.download(url, tmp_path, self.max_file_bytes)
+        if result is None:
+            self._remember_failure(url)
+            return None
+
+        digest, size, content_type = result
+        ext = self._guess_ext(url, content_type)
+        try:
+            return await self._adopt(url, tmp_path, digest, size, ext)
+        except OSError as e:
+            logger.error(f"写入图片缓存失败：{e}")
+            return None
+
+    async def _adopt(self, url: str, tmp_path: Path, digest: str, size: int, ext: str) -> Path:
+        """将下载完成的临时文件移入缓存并登记索引，文件操作在线程池中执行"""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            path = self._blob_path(digest, ext)
+            await loop.run_in_executor(None, self._place_sync, tmp_path, path)
+
+            now = time.time()
+            old = self._index.get(url)
+            self._index[url] = {"hash": digest, "ext": ext, "size": size, "atime": now, "hits": 1, "fetched": now}
+            removed: List[Path] = []
+            if old is not None and old["hash"] != digest:
+                # 重新发布的图片内容变化，旧文件不再被引用时删除
+                self._drop_data_uri(url)
+                removed += self._unreferenced(old)
+            removed += self._evict()
+            if removed:
+                await loop.run_in_executor(None, self._unlink_sync, removed)
+            self._schedule_save()
+            return path
+
+    @staticmethod
+    def _place_sync(tmp_path: Path, path: Path):
+        """临时文件移入缓存目录，相同内容已存在时丢弃临时文件"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def _unlink_sync(paths: List[Path]):
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _unreferenced(self, meta: Dict[str, Any]) -> List[Path]:
+        """没有其他 URL 引用同一内容时返回待删除的文件"""
+        if any(m["hash"] == meta["hash"] for m in self._index.values()):
+            return []
+        return [self._blob_path(meta["hash"], meta.get("ext", ""))]
+
+    def _evict(self) -> List[Path]:
+        """
+        按访问时间淘汰索引条目，直到总大小不超过上限
+        :return: 需要删除的文件，由调用方在线程池中删除
+        """
+        total = self.total_bytes
+        if total <= self.max_bytes:
+            return []
+
+        removed: List[Path] = []
+        for url, meta in sorted(self._index.items(), key=lambda kv: kv[1]["atime"]):
+            if total <= self.max_bytes:
+                break
+            del self._index[url]
+            self._drop_data_uri(url)
+            paths = self._unreferenced(meta)
+            if paths:
+                removed += paths
+                total -= meta["size"]
+        return removed
+
+    """===================== data URI ====================="""
+
+    async def data_uri(self, url: str, api_client) -> Optional[str]:
+        """
+        获取 URL 对应图片的 data URI，未缓存时先下载
+        :return: data URI，下载失败或超过内嵌大小上限返回 None
+        """
+        uri = self._data_uris.get(url)
+        if uri is not None and self._expired(self._index.get(url) or {}):
+            # 文件已过期，重新下载后再生成
+            self._drop_data_uri(url)
+            uri = None
+        if uri is not None:
+            self._data_uris.move_to_end(url)
+            self.hits += 1
+            meta = self._index.get(url)
+            if meta is not None:
+                meta["atime"] = time.time()
+                meta["hits"] = meta.get("hits", 0) + 1
+            return uri
+
+        path = await self.fetch(url, api_client)
+        if path is None:
+            return None
+        meta = self._index.get(url)
+        if meta is not None and meta["size"] > self.max_inline_bytes:
+            return None
+        try:
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, path.read_bytes)
+        except OSError as e:
+            logger.error(f"读取图片缓存失败：{e}")
+            self.forget(url)
+            return None
+        if len(content) > self.max_inline_bytes:
+            return None
+
+        mime = mimetypes.guess_type(path.name)[0] or "image/png"
+        uri = f"data:{mime};base64,{base64.b64encode(content).decode('ascii')}"
+        self._remember_data_uri(url, uri)
+        return uri
+
+    def _remember_data_uri(self, url: str, uri: str):
+        self._drop_data_uri(url)
+        self._data_uris[url] = uri
+        self._memory_bytes += len(uri)
+        while self._memory_bytes > self.max_memory_bytes and len(self._data_uris) > 1:
+            _, old = self._data_uris.popitem(last=False)
+            self._memory_bytes -= len(old)
+
+    def _drop_data_uri(self, url: str):
+        old = self._data_uris.pop(url, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+
+    def hot(self, limit: int) -> List[str]:
+        """按命中次数排序的热门 URL"""
+        ranked = sorted(self._index.items(), key=lambda kv: kv[1].get("hits", 0), reverse=True)
+        return [url for url, meta in ranked[:limit] if meta.get("hits", 0)]
+
+    async def prefetch(self, urls: List[str], api_client) -> int:
+        """预先加载一批图片的 data URI，返回成功数量"""
+        loaded = 0
+        for url in urls:
+            if url in self._data_uris:
+                loaded += 1
+                continue
+            if await self.data_uri(url, api_client) is not None:
+                loaded += 1
+        return loaded
+
+    @staticmethod
+    def _guess_ext(url: str, content_type: str) -> str:
+        ext = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ""
+        if not ext:
+            ext = Path(url.split("?", 1)[0]).suffix[:8]
+        return ".jpg" if ext == ".jpe" else ext
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "files": len({meta["hash"] for meta in self._index.values()}),
+            "urls": len(self._index),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "inline": len(self._data_uris),
+            "inline_bytes": self._memory_bytes,
+        }
+
@@ -1,19 +1,13 @@
-from pathlib import Path
 from datetime import datetime,date
-import aiofiles
+
+from .template_registry import templates
 
 async def load_template(template_name: str) -> str:
     """
-    异步加载模板内容（非阻塞）
+    加载模板内容
+    模板在插件初始化时已由 TemplateRegistry 读入内存，这里不再产生文件 I/O
     """
-    plugin_dir = Path(__file__).parent.parent
-    template_path = plugin_dir / "templates" / template_name
-
-    if not template_path.exists():
-        raise FileNotFoundError(f"模板文件不存在: {template_path}")
-
-    async with aiofiles.open(template_path, "r", encoding="utf-8") as f:
-        return await f.read()
+    return templates.get(template_name)
     
 
 def gold_to_string(gold_amount):
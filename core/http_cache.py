@@ -0,0 +1,166 @@
+import time
+import sqlite3
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from astrbot.api import logger
+
+from .json_codec import json_loads, json_dumps, JSONDecodeError
+
+
+class PersistentCache:
+    """
+    基于 SQLite 的持久化响应缓存
+
+    1. 以缓存键保存接口数据及 ETag / Last-Modified 校验信息。
+    2. 插件重启后用于预热内存缓存，并在过期后发起条件请求重新校验。
+    3. sqlite3 为同步接口，所有操作放到线程池执行，避免阻塞事件循环。
+    4. 启动时及运行中每隔 prune_interval 秒清理超过 max_age 的记录，并按保存时间只保留最新的 max_rows 条。
+    """
+
+    def __init__(self, db_path: Path, max_age: float = 86400, max_rows: int = 2000, prune_interval: float = 600):
+        self.db_path = Path(db_path)
+        self.max_age = max_age
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    """===================== 同步实现 (线程池中执行) ====================="""
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    config_key TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    stored_at REAL NOT NULL,
+                    ttl REAL NOT NULL,
+                    stale_ttl REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_stored_at ON responses (stored_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _row_to_dict(self, row) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        key, config_key, payload, etag, last_modified, stored_at, ttl, stale_ttl = row
+        try:
+            value = json_loads(payload)
+        except JSONDecodeError:
+            return None
+        return {
+            "key": key,
+            "config_key": config_key,
+            "payload": value,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": stored_at,
+            "ttl": ttl,
+            "stale_ttl": stale_ttl,
+        }
+
+    def _get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT key, config_key, payload, etag, last_modified, stored_at, ttl, stale_ttl "
+                "FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+        return self._row_to_dict(row)
+
+    def _put_sync(self, key, config_key, payload, etag, last_modified, ttl, stale_ttl):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, config_key, payload, etag, last_modified, stored_at, ttl, stale_ttl) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, config_key, json_dumps(payload), etag, last_modified, time.time(), ttl, stale_ttl)
+            )
+            if time.monotonic() - self._last_prune >= self.prune_interval:
+                self._prune_locked(conn)
+            conn.commit()
+
+    def _prune_locked(self, conn: sqlite3.Connection):
+        """清理过期记录并限制总行数，调用方需持有锁"""
+        conn.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.max_age,))
+        if self.max_rows > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            )
+        self._last_prune = time.monotonic()
+
+    def _touch_sync(self, key: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+
+    def _load_all_sync(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            conn = self._connect()
+            self._prune_locked(conn)
+            conn.commit()
+            rows = conn.execute(
+                "SELECT key, config_key, payload, etag, last_modified, stored_at, ttl, stale_ttl FROM responses"
+            ).fetchall()
+        return [r for r in (self._row_to_dict(row) for row in rows) if r is not None]
+
+    def _close_sync(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    """===================== 异步接口 ====================="""
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, func, *args)
+        except sqlite3.Error as e:
+            logger.error(f"持久化缓存操作失败：{e}")
+            return None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get_sync, key)
+
+    async def put(
+        self,
+        key: str,
+        config_key: str,
+        payload: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        ttl: float = 0,
+        stale_ttl: float = 0
+    ):
+        await self._run(self._put_sync, key, config_key, payload, etag, last_modified, ttl, stale_ttl)
+
+    async def touch(self, key: str):
+        """条件请求返回 304 时刷新保存时间"""
+        await self._run(self._touch_sync, key)
+
+    async def load_all(self) -> List[Dict[str, Any]]:
+        return await self._run(self._load_all_sync) or []
+
+    async def close(self):
+        await self._run(self._close_sync)
@@ -0,0 +1,39 @@
+import json
+from typing import Any, Union
+
+# orjson 为可选依赖，安装后自动启用，否则回退到标准库
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# 超过该大小的响应体放到线程池中解析，避免阻塞事件循环
+LARGE_PAYLOAD_BYTES = 512 * 1024
+
+
+class JSONDecodeError(ValueError):
+    """统一两种解析器的解析异常"""
+
+
+def json_loads(data: Union[bytes, bytearray, str]) -> Any:
+    """
+    解析 JSON，优先使用 orjson
+    :raises JSONDecodeError: 内容不是合法 JSON
+    """
+    try:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    except ValueError as e:
+        # orjson.JSONDecodeError 与 json.JSONDecodeError 均继承自 ValueError
+        raise JSONDecodeError(str(e)) from e
+
+
+def json_dumps(value: Any) -> bytes:
+    """序列化为 UTF-8 编码的 JSON，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
@@ -3,18 +3,78 @@
 # pyright: reportAttributeAccessIssue=false
 # pyright: reportIndexIssue=false
 
+import math
+import time
+import heapq
+import asyncio
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, Callable, Tuple
 
 from astrbot.api import logger
 from astrbot.api import AstrBotConfig
-
-from .request import APIClient
+from astrbot.api.star import StarTools
+
+from .request import APIClient, UpstreamError
+from .circuit_breaker import CircuitBreaker
+from .file_cache import FileCache
+from .http_cache import PersistentCache
+from .cache import TTLCache, make_cache_key
+from .rate_limit import RateLimiter, RateLimitExceeded
 from .function_basic import load_template,gold_to_string,week_to_num,compare_date_str
 
+# 业务函数使用的全部模板，插件初始化时校验
+REQUIRED_TEMPLATES = (
+    "helps.html",
+    "richangyuche.html",
+    "xingxiashijian.html",
+    "qufuzhuangtai.html",
+    "jinjia.html",
+    "qiyuliebiao.html",
+    "wujia.html",
+    "jiaoyihang.html",
+    "yanhuan.html",
+    "dilujilu.html",
+    "tuanduizhaomu.html",
+    "zhanji.html",
+    "juesheqiyu.html",
+    "zhengyingpaimai.html",
+)
+
+
 class JX3Service:
     def __init__(self, api_config, config:AstrBotConfig):
-        self._api = APIClient()
+        # 上游限流，按 (主机, token) 分桶，保护付费 token 的调用额度
+        rl_conf = config.get("rate_limit", {})
+        self.rate_limit_enable = rl_conf.get("enable", True)
+        self._limiter = RateLimiter(
+            rate=rl_conf.get("rate", 5),
+            burst=rl_conf.get("burst", 10),
+            max_waiters=rl_conf.get("max_waiters", 20),
+            timeout=rl_conf.get("timeout", 3)
+        )
+        # 连接池配置
+        http_conf = config.get("http", {})
+        self._api = APIClient(
+            base_timeout=http_conf.get("total_timeout", 10),
+            limit=http_conf.get("limit", 100),
+            limit_per_host=http_conf.get("limit_per_host", 20),
+            ttl_dns_cache=http_conf.get("dns_cache_ttl", 300),
+            keepalive_timeout=http_conf.get("keepalive_timeout", 30),
+            connect_timeout=http_conf.get("connect_timeout", 5),
+            read_timeout=http_conf.get("read_timeout", 0),
+            rate_limiter=self._limiter if self.rate_limit_enable else None,
+            max_retries=http_conf.get("max_retries", 2),
+            retry_backoff=http_conf.get("retry_backoff", 0.3),
+            retry_deadline=http_conf.get("retry_deadline", 0),
+            max_binary_bytes=int(http_conf.get("max_file_mb", 10) * 1024 * 1024)
+        )
+        # 接口熔断，连续失败后短时间内直接返回失败，避免每次都等满超时
+        breaker_conf = config.get("breaker", {})
+        self.breaker_enable = breaker_conf.get("enable", True)
+        self._breaker = CircuitBreaker(
+            failure_threshold=breaker_conf.get("failure_threshold", 5),
+            cooldown=breaker_conf.get("cooldown", 30)
+        )
         # 获取API配置文件
         self._api_config = api_config
         # 获取插件配置文件
@@ -31,15 +91,185 @@ class JX3Service:
             logger.info("获取配置ticket失败，请正确填写ticket,否则部分功能无法正常使用")
         else:
             logger.debug(f"获取配置ticket成功。{self.ticket}")
+        # 接口响应缓存
+        cache_conf = self._config.get("cache", {})
+        self.cache_enable = cache_conf.get("enable", True)
+        # 内存缓存淘汰的键同时丢弃其 ETag / Last-Modified，校验信息不会无限增长
+        self._cache = TTLCache(
+            max_size=cache_conf.get("max_size", 256),
+            on_evict=lambda key: self._validators.pop(key, None)
+        )
+        # 持久化缓存，重启后预热并用于条件请求
+        self._store: Optional[PersistentCache] = None
+        if self.cache_enable and cache_conf.get("persistent", True):
+            self._store = PersistentCache(
+                StarTools.get_data_dir("astrbot_plugin_jx3") / "http_cache.db",
+                max_age=cache_conf.get("persist_max_age", 24) * 3600,
+                max_rows=cache_conf.get("persist_max_rows", 2000)
+            )
+        # cache_key -> (ETag, Last-Modified)
+        self._validators: Dict[str, tuple] = {}
+        # 沙盘、名片等图片的本地文件缓存
+        image_conf = self._config.get("image_cache", {})
+        self.image_cache_enable = image_conf.get("enable", True)
+        self._files = FileCache(
+            StarTools.get_data_dir("astrbot_plugin_jx3") / "image_cache",
+            max_bytes=int(image_conf.get("max_mb", 200) * 1024 * 1024),
+            max_file_bytes=self._api.max_binary_bytes,
+            max_inline_bytes=int(image_conf.get("inline_max_kb", 256) * 1024),
+            max_memory_bytes=int(image_conf.get("memory_mb", 8) * 1024 * 1024),
+            max_age=image_conf.get("max_age_hours", 24) * 3600,
+            failure_ttl=image_conf.get("failure_ttl", 300)
+        )
+        self.image_prefetch = image_conf.get("prefetch", 50)
+        self.inline_timeout = image_conf.get("inline_timeout", 2)
+        self._prefetch_task: Optional[asyncio.Task] = None
+        # 后台刷新中的缓存任务 (stale-while-revalidate)
+        self._refreshing: Dict[str, asyncio.Task] = {}
         
 
     async def close(self):
         """释放底层 APIClient 资源"""
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
+        if self._prefetch_task:
+            self._prefetch_task.cancel()
+        await self._files.close()
+        if self._store:
+            await self._store.close()
         if self._api:
             await self._api.close()
             self._api = None
 
 
+    def runtime_info(self) -> str:
+        """运行状态信息"""
+        cache = self._cache.stats()
+        flight = self._api.stats()
+        return (
+            f"接口缓存：{'开启' if self.cache_enable else '关闭'}\n"
+            f"缓存条目：{cache['size']}/{cache['max_size']}\n"
+            f"命中：{cache['hits']}  旧数据命中：{cache['stale_hits']}  未命中：{cache['misses']}  命中率：{cache['hit_rate']:.2%}\n"
+            f"后台刷新中：{len(self._refreshing)}\n"
+            f"请求合并：实际请求 {flight['executed']}  合并 {flight['shared']}  进行中 {flight['inflight']}\n"
+            f"{self._pool_info()}\n"
+            f"{self._limiter_info()}\n"
+            f"{self._breaker_info()}\n"
+            f"{self._files_info()}"
+        )
+
+
+    def _files_info(self) -> str:
+        """图片缓存状态信息"""
+        if not self.image_cache_enable:
+            return "图片缓存：关闭"
+        f = self._files.stats()
+        return (
+            f"图片缓存：{f['files']} 个文件  {f['bytes'] / 1024 / 1024:.1f}/{f['max_bytes'] / 1024 / 1024:.0f} MB"
+            f"  命中 {f['hits']}  未命中 {f['misses']}"
+            f"  内嵌 {f['inline']} 个 {f['inline_bytes'] / 1024:.0f} KB"
+        )
+
+
+    async def cached_image(self, url: str) -> str:
+        """
+        获取图片的本地缓存路径
+        :return: 本地文件路径，未启用缓存或下载失败时原样返回 URL
+        """
+        if not self.image_cache_enable or not url:
+            return url
+        path = await self._files.fetch(url, self._api)
+        return str(path) if path else url
+
+
+    async def inline_image(self, url: str) -> str:
+        """
+        将远程图片转为 data URI 写入模板数据，渲染时无需再逐个联网获取
+        :return: data URI，未启用缓存、下载失败或图片过大时原样返回 URL
+        """
+        if not self.image_cache_enable or not url:
+            return url
+        return await self._files.data_uri(url, self._api) or url
+
+
+    async def inline_images(self, urls: List[str]) -> List[str]:
+        """
+        批量转为 data URI，总等待时间不超过 inline_timeout
+        超时未完成的图片保留远程 URL，下载在后台继续，下次查询即可命中缓存
+        """
+        if not self.image_cache_enable or not urls:
+            return list(urls)
+
+        tasks = [asyncio.ensure_future(self.inline_image(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=self.inline_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.debug(f"图片内嵌超时，{len(pending)}/{len(urls)} 张使用远程地址")
+
+        return [
+            task.result() if task in done and not task.exception() else url
+            for task, url in zip(tasks, urls)
+        ]
+
+
+    def start_prefetch(self):
+        """后台预加载最常用的图标和头像"""
+        if not self.image_cache_enable or self.image_prefetch <= 0:
+            return
+
+        async def _job():
+            urls = self._files.hot(self.image_prefetch)
+            try:
+                loaded = await self._files.prefetch(urls, self._api)
+                logger.info(f"常用图片预加载完成：{loaded}/{len(urls)}")
+            except Exception as e:
+                logger.error(f"常用图片预加载失败: {e}")
+
+        self._prefetch_task = asyncio.create_task(_job())
+
+
+    def _breaker_info(self) -> str:
+        """熔断状态信息，只列出有失败记录的接口"""
+        if not self.breaker_enable:
+            return "熔断：关闭"
+        names = {"closed": "正常", "open": "熔断", "half_open": "探测中"}
+        lines = ["熔断："]
+        for key, b in self._breaker.stats().items():
+            if b["state"] == "closed" and not b["failures"]:
+                continue
+            line = f"  {key}：{names.get(b['state'], b['state'])}  连续失败 {b['failures']}"
+            if "retry_in" in b:
+                line += f"  {b['retry_in']}s 后探测"
+            lines.append(line)
+        if len(lines) == 1:
+            lines[0] += "全部正常"
+        return "\n".join(lines)
+
+
+    def _limiter_info(self) -> str:
+        """限流状态信息"""
+        if not self.rate_limit_enable:
+            return "限流：关闭"
+        lines = [f"限流：{self._limiter.rate}/s  突发 {self._limiter.burst}"]
+        for bucket, l in self._limiter.stats().items():
+            lines.append(f"  {bucket}：剩余令牌 {l['tokens']:.1f}  排队 {l['waiters']}  拒绝 {l['rejected']}")
+        return "\n".join(lines)
+
+
+    def _pool_info(self) -> str:
+        """连接池状态信息"""
+        pool = self._api.pool_stats()
+        lines = [
+            f"连接池：使用中 {pool['acquired']}  空闲 {pool['idle']}  等待 {pool['acquiring']}"
+            f"  (上限 {pool['limit']}，单主机 {pool['limit_per_host']})"
+        ]
+        for host, h in pool["hosts"].items():
+            lines.append(f"  {host}：使用中 {h['acquired']}  空闲 {h['idle']}  等待 {h['acquiring']}")
+        return "\n".join(lines)
+
+
     def _init_return_data(self) -> Dict[str, Any]:
             """初始化标准的返回数据结构"""
             return {
@@ -49,12 +279,45 @@ class JX3Service:
             }
     
 
+    def _select_rows(
+        self,
+        config_key: str,
+        rows: List[Any],
+        page: int,
+        sorters: Dict[str, Tuple[Callable[[Any], Any], bool]]
+    ) -> Tuple[List[Any], Dict[str, int]]:
+        """
+        按接口配置的 row_limit / sort_by 选出一页数据，在格式化和渲染之前限制行数
+        :param sorters: 排序方式 -> (排序键, 是否从大到小)
+        :return: (当前页数据, 分页信息)
+        """
+        conf = self._api_config.get(config_key, {})
+        limit = conf.get("row_limit", 0)
+        total = len(rows)
+        if limit <= 0:
+            return rows, {"page": 1, "pages": 1, "total": total}
+
+        pages = max(math.ceil(total / limit), 1)
+        page = min(max(page, 1), pages)
+        end = page * limit
+
+        sorter = sorters.get(conf.get("sort_by", ""))
+        if sorter is not None:
+            key, reverse = sorter
+            # 只取前 end 条，不对整个列表排序
+            select = heapq.nlargest if reverse else heapq.nsmallest
+            rows = select(end, rows, key=key)
+
+        return rows[end - limit:end], {"page": page, "pages": pages, "total": total}
+
+
     async def _base_request(
         self, 
         config_key: str, 
         method: str, 
         params: Optional[Dict[str, Any]] = None, 
-        out_key: Optional[str] = "data"
+        out_key: Optional[str] = "data",
+        fresh: bool = False
     ) -> Optional[Any]:
         """
         基础请求封装，处理配置获取和API调用。
@@ -63,7 +326,9 @@ class JX3Service:
         :param method: HTTP方法 ('GET' 或 'POST')。
         :param params: 请求参数或 Body 数据。
         :param out_key: 响应数据中需要提取的字段。
+        :param fresh: 跳过缓存读取直接请求上游 (结果仍写入缓存)，用于后台监控。
         :return: 成功时返回提取后的数据，失败时返回 None。
+        :raises RateLimitExceeded: 限流排队已满或等待超时且没有可用的旧数据。
         """
         try:
             api_config = self._api_config.get(config_key)
@@ -80,22 +345,174 @@ class JX3Service:
             if not url:
                 logger.error(f"API配置缺少 URL: {config_key}")
                 return None
-                
-            if method.upper() == 'POST':
-                data = await self._api.post(url, data=request_params, out_key=out_key)
-            else: # 默认为 GET
-                data = await self._api.get(url, params=request_params, out_key=out_key)
-            
-            if not data:
-                logger.warning(f"获取接口信息失败或返回空数据: {config_key}")
+
+            # 优先读取缓存，TTL 由 api_config.json 中的 cache_ttl 决定
+            cache_ttl = api_config.get("cache_ttl", 0) if self.cache_enable else 0
+            stale_ttl = api_config.get("stale_ttl", 0)
+            cache_key = make_cache_key(config_key, request_params, out_key)
+            stale = None
+            if cache_ttl > 0 and not fresh:
+                entry = await self._cache.get_entry(cache_key, allow_stale=stale_ttl > 0)
+                if entry is not None:
+                    cached, is_fresh = entry
+                    if is_fresh:
+                        logger.debug(f"命中接口缓存: {config_key}")
+                        return cached
+                    if api_config.get("swr", False):
+                        # 先返回旧数据，后台刷新
+                        logger.debug(f"返回旧数据并后台刷新: {config_key}")
+                        self._refresh_in_background(config_key, cache_key, method, url, request_params, out_key)
+                        return cached
+                    stale = cached
+
+            try:
+                data = await self._fetch(config_key, cache_key, method, url, request_params, out_key)
+            except RateLimitExceeded:
+                if stale is None:
+                    raise
+                data = None
+
+            # 上游异常时在最大陈旧时间内兜底返回旧数据
+            if not data and stale is not None:
+                logger.warning(f"接口请求失败，返回缓存旧数据: {config_key}")
+                return stale
             
             return data
+
+        except RateLimitExceeded as e:
+            logger.warning(f"请求被限流 ({config_key}): {e}")
+            raise
             
         except Exception as e:
             logger.error(f"基础请求调用出错 ({config_key}): {e}")
             return None
 
 
+    async def _fetch(
+        self,
+        config_key: str,
+        cache_key: str,
+        method: str,
+        url: str,
+        request_params: Dict[str, Any],
+        out_key: Optional[str]
+    ) -> Optional[Any]:
+        """调用API并写入缓存"""
+        if self.breaker_enable and not self._breaker.allow(config_key):
+            logger.warning(f"接口处于熔断状态，跳过请求: {config_key}")
+            return None
+
+        api_config = self._api_config.get(config_key, {})
+        cache_ttl = api_config.get("cache_ttl", 0) if self.cache_enable else 0
+        stale_ttl = api_config.get("stale_ttl", 0)
+        validators: Dict[str, Optional[str]] = {}
+
+        try:
+            if method.upper() == 'POST':
+                data = await self._api.post(url, data=request_params, out_key=out_key, raise_errors=True)
+            elif cache_key in self._validators:
+                # 有 ETag / Last-Modified 时发起条件请求，未变化则复用持久化的数据
+                etag, last_modified = self._validators[cache_key]
+                status, data, validators = await self._api.get_conditional(
+                    url, request_params, out_key, etag=etag, last_modified=last_modified, raise_errors=True
+                )
+                if status == 304:
+                    stored = await self._store.get(cache_key) if self._store else None
+                    data = stored["payload"] if stored else None
+                    if data:
+                        logger.debug(f"接口数据未变化 (304): {config_key}")
+                        await self._store.touch(cache_key)
+                        await self._cache.set(cache_key, data, cache_ttl, stale_ttl)
+                        self._breaker.record_success(config_key)
+                        return data
+                    # 本地数据丢失，去掉校验信息重新完整请求
+                    self._validators.pop(cache_key, None)
+                    validators = {}
+                    data = await self._api.get(url, params=request_params, out_key=out_key, raise_errors=True)
+            else: # 默认为 GET
+                if self._store is not None and cache_ttl > 0:
+                    _, data, validators = await self._api.get_conditional(
+                        url, request_params, out_key, raise_errors=True
+                    )
+                else:
+                    data = await self._api.get(url, params=request_params, out_key=out_key, raise_errors=True)
+        except UpstreamError:
+            self._breaker.record_failure(config_key)
+            data = None
+        else:
+            self._breaker.record_success(config_key)
+        
+        if not data:
+            logger.warning(f"获取接口信息失败或返回空数据: {config_key}")
+        elif cache_ttl > 0:
+            await self._cache.set(cache_key, data, cache_ttl, stale_ttl)
+            await self._persist(config_key, cache_key, data, validators, cache_ttl, stale_ttl)
+
+        return data
+
+
+    async def _persist(
+        self,
+        config_key: str,
+        cache_key: str,
+        data: Any,
+        validators: Dict[str, Optional[str]],
+        cache_ttl: float,
+        stale_ttl: float
+    ):
+        """写入持久化缓存并记录校验信息"""
+        if self._store is None or isinstance(data, bytes):
+            return
+
+        etag = validators.get("etag")
+        last_modified = validators.get("last_modified")
+        if etag or last_modified:
+            self._validators[cache_key] = (etag, last_modified)
+        else:
+            self._validators.pop(cache_key, None)
+
+        await self._store.put(cache_key, config_key, data, etag, last_modified, cache_ttl, stale_ttl)
+
+
+    async def warm_cache(self):
+        """插件启动时将持久化缓存预热到内存，并读取图片缓存索引"""
+        if self.image_cache_enable:
+            await self._files.load()
+
+        if self._store is None:
+            return
+
+        rows = await self._store.load_all()
+        now = time.time()
+        for row in rows:
+            age = now - row["stored_at"]
+            await self._cache.restore(
+                row["key"], row["payload"],
+                fresh_for=row["ttl"] - age,
+                stale_for=row["ttl"] + row["stale_ttl"] - age
+            )
+            if row["etag"] or row["last_modified"]:
+                self._validators[row["key"]] = (row["etag"], row["last_modified"])
+
+        logger.info(f"持久化缓存预热完成：{len(rows)} 条，可条件请求 {len(self._validators)} 条")
+
+
+    def _refresh_in_background(self, config_key: str, cache_key: str, *args):
+        """后台刷新缓存，同一缓存键同时只有一个刷新任务"""
+        if cache_key in self._refreshing:
+            return
+
+        async def _job():
+            try:
+                await self._fetch(config_key, cache_key, *args)
+            except Exception as e:
+                logger.error(f"后台刷新缓存失败 ({config_key}): {e}")
+            finally:
+                self._refreshing.pop(cache_key, None)
+
+        self._refreshing[cache_key] = asyncio.create_task(_job())
+
+
     # --- 业务功能函数 ---
     async def helps(self) -> Dict[str, Any]:
         """帮助"""
@@ -158,8 +575,11 @@ class JX3Service:
 
         return return_data
     
-    async def richangyuche(self) -> Dict[str, Any]:
-        """日常预测"""
+    async def richangyuche(self, fresh: bool = False) -> Dict[str, Any]:
+        """
+        日常预测
+        :param fresh: 跳过接口缓存，每日重置后预渲染使用
+        """
         return_data = self._init_return_data()
 
         # 1. 构造请求参数
@@ -167,7 +587,7 @@ class JX3Service:
 
         # 2. 调用基础请求
         data: Optional[Dict[str, Any]] = await self._base_request(
-            "jx3_richangyuche", "GET", params=params
+            "jx3_richangyuche", "GET", params=params, fresh=fresh
         )
         if not data:
             return_data["msg"] = "获取接口信息失败"
@@ -270,7 +690,7 @@ class JX3Service:
         # 3. 处理返回数据 (直接提取图片 URL)
         pic_url = data.get("picUrl")
         if pic_url:
-            return_data["data"] = pic_url
+            return_data["data"] = await self.cached_image(pic_url)
             return_data["code"] = 200
         else:
             return_data["msg"] = "接口未返回图片URL"
@@ -278,8 +698,11 @@ class JX3Service:
         return return_data
     
 
-    async def kaifu(self, server: str) -> Dict[str, Any]:
-        """开服状态查询"""
+    async def kaifu(self, server: str, fresh: bool = False) -> Dict[str, Any]:
+        """
+        开服状态查询
+        :param fresh: 跳过接口缓存，后台监控使用
+        """
         return_data = self._init_return_data()
         
         # 1. 构造请求参数
@@ -287,7 +710,7 @@ class JX3Service:
         
         # 2. 调用基础请求
         data: Optional[Dict[str, Union[int, str]]] = await self._base_request(
-            "jx3_kaifu", "GET", params=params
+            "jx3_kaifu", "GET", params=params, fresh=fresh
         )
         
         if not data:
@@ -318,6 +741,42 @@ class JX3Service:
         return return_data
 
 
+    async def kaifu_servers(self, servers: List[str]) -> Dict[str, Any]:
+        """
+        多服务器开服状态，一次区服状态请求覆盖全部服务器
+        :return: data 为 {服务器: {"status": 是否开服, "data": 推送文本}}，未找到的服务器不返回
+        """
+        return_data = self._init_return_data()
+
+        data: Optional[List[Dict[str, Any]]] = await self._base_request("jx3_zhuangtai", "GET", fresh=True)
+
+        if not data:
+            return_data["msg"] = "获取接口信息失败"
+            return return_data
+
+        try:
+            wanted = set(servers)
+            status_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for item in data:
+                server = item["server"]
+                if server not in wanted:
+                    continue
+                if item.get("status") != "维护":
+                    status_str = f"{server}服务器已开服，快冲，快冲！\n检测时间：{status_time}"
+                    status_bool = True
+                else:
+                    status_str = f"{server}服务器当前维护中，等会再来吧！\n检测时间：{status_time}"
+                    status_bool = False
+                return_data["data"][server] = {"status": status_bool, "data": status_str}
+
+            return_data["code"] = 200
+        except Exception as e:
+            logger.error(f"kaifu_servers 数据处理时出错: {e}")
+            return_data["msg"] = "处理接口返回信息时出错"
+
+        return return_data
+
+
     async def shaohua(self) -> Dict[str, Any]:
         """骚话"""
         return_data = self._init_return_data()
@@ -339,12 +798,15 @@ class JX3Service:
         return return_data
     
 
-    async def zhuangtai(self) -> Dict[str, Any]:
-        """区服状态"""
+    async def zhuangtai(self, fresh: bool = False) -> Dict[str, Any]:
+        """
+        区服状态
+        :param fresh: 跳过接口缓存 (不返回 SWR 旧数据)，预渲染使用
+        """
         return_data = self._init_return_data()
         
         
-        data: Optional[Dict[str, Any]] = await self._base_request("jx3_zhuangtai", "GET") 
+        data: Optional[Dict[str, Any]] = await self._base_request("jx3_zhuangtai", "GET", fresh=fresh) 
         
         if not data:
             return_data["msg"] = "获取接口信息失败"
@@ -407,12 +869,15 @@ class JX3Service:
         return return_data
     
 
-    async def xinwen(self) -> Dict[str, Any]:
-        """新闻资讯"""
+    async def xinwen(self, fresh: bool = False) -> Dict[str, Any]:
+        """
+        新闻资讯
+        :param fresh: 跳过接口缓存，后台监控使用
+        """
         return_data = self._init_return_data()
         
         # 提取字段可能返回列表
-        data: Optional[List[Dict[str, Any]]] = await self._base_request("jx3_xinweng", "GET")
+        data: Optional[List[Dict[str, Any]]] = await self._base_request("jx3_xinweng", "GET", fresh=fresh)
         
         if not data or not isinstance(data, list):
             return_data["msg"] = "获取接口信息失败或数据格式错误"
@@ -474,7 +939,7 @@ class JX3Service:
         return return_data
 
 
-    async def qiyu(self, adventureName: str, serverName: str) -> Dict[str, Any]:
+    async def qiyu(self, adventureName: str, serverName: str, page: int = 1) -> Dict[str, Any]:
         """区服奇遇"""
         return_data = self._init_return_data()
         
@@ -484,6 +949,10 @@ class JX3Service:
         if not data_list or not isinstance(data_list, list):
             return_data["msg"] = "获取接口信息失败或数据格式错误"
             return return_data
+
+        data_list, page_info = self._select_rows("aijx3_qiyu", data_list, page, {
+            "time": (lambda m: m.get("time") or 0, True),
+        })
             
         # 格式化时间
         for item in data_list:
@@ -508,7 +977,8 @@ class JX3Service:
                 "items": data_list,
                 "server": serverName,
                 "update_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "qiyuname": adventureName
+                "qiyuname": adventureName,
+                **page_info
             }
             return_data["code"] = 200
         except Exception as e:
@@ -545,7 +1015,7 @@ class JX3Service:
         return return_data
 
 
-    async def jiaoyihang(self, name: str , server: str) -> Dict[str, Any]:
+    async def jiaoyihang(self, name: str , server: str, page: int = 1) -> Dict[str, Any]:
         """区服交易行"""
         return_data = self._init_return_data()
 
@@ -560,6 +1030,19 @@ class JX3Service:
         if not data:
             return_data["msg"] = "未找到该物品"
             return return_data
+
+        if not isinstance(data, list):
+            return_data["msg"] = "获取接口信息失败或数据格式错误"
+            return return_data
+
+        def _first(item):
+            inner_list = item.get("data") or [{}]
+            return inner_list[0]
+
+        data, page_info = self._select_rows("jx3_jiaoyihang", data, page, {
+            "time": (lambda m: _first(m).get("created") or 0, True),
+            "price": (lambda m: _first(m).get("unit_price") or float("inf"), False),
+        })
         
         # 2. 数据处理
         result = []
@@ -580,8 +1063,14 @@ class JX3Service:
         except Exception as e:
             logger.error(f"处理交易行数据失败: {e}")
             return_data["msg"] = "处理交易行数据失败"
+
+        # 3. 图标转为本地缓存的 data URI
+        icons = await self.inline_images([item["icon"] for item in result])
+        for item, icon in zip(result, icons):
+            item["icon"] = icon
             
         return_data["data"]["list"] = result
+        return_data["data"].update(page_info)
 
         # 5. 模板渲染
         try:
@@ -610,7 +1099,8 @@ class JX3Service:
             return_data["msg"] = "未找到该角色"
             return return_data
             
-        # 3. 处理返回数据 (直接提取图片 URL)
+        # 3. 处理返回数据 (直接提取图片 URL，并缓存到本地)
+        data["showAvatarPath"] = await self.cached_image(data.get("showAvatar", ""))
         return_data["data"] = data
         return_data["code"] = 200
         
@@ -633,14 +1123,15 @@ class JX3Service:
             return_data["msg"] = "获取接口信息失败"
             return return_data
             
-        # 3. 处理返回数据 (直接提取图片 URL)
+        # 3. 处理返回数据 (直接提取图片 URL，并缓存到本地)
+        data["showAvatarPath"] = await self.cached_image(data.get("showAvatar", ""))
         return_data["data"] = data
         return_data["code"] = 200
         
         return return_data
 
 
-    async def yanhuachaxun(self, server: str, name:str ) -> Dict[str, Any]:
+    async def yanhuachaxun(self, server: str, name:str, page: int = 1) -> Dict[str, Any]:
         """烟花查询"""
         return_data = self._init_return_data()
         
@@ -652,10 +1143,14 @@ class JX3Service:
             "jx3_yanhuachaxun", "GET", params=params
         )
         
-        if not data:
-            return_data["msg"] = "获取接口信息失败"
+        if not data or not isinstance(data, list):
+            return_data["msg"] = "获取接口信息失败或数据格式错误"
             return return_data
             
+        data, page_info = self._select_rows("jx3_yanhuachaxun", data, page, {
+            "time": (lambda m: m.get("time") or 0, True),
+        })
+
         # 3. 处理返回数据 (直接提取图片 URL)
                 # 格式化时间
         for item in data:
@@ -675,12 +1170,13 @@ class JX3Service:
             return return_data
         
         return_data["data"]["list"] = data
+        return_data["data"].update(page_info)
         return_data["code"] = 200
         
         return return_data
 
 
-    async def dilujilu(self, server: str) -> Dict[str, Any]:
+    async def dilujilu(self, server: str, page: int = 1) -> Dict[str, Any]:
         """的卢记录"""
         return_data = self._init_return_data()
         
@@ -692,10 +1188,15 @@ class JX3Service:
             "jx3_dilujilu", "GET", params=params
         )
         
-        if not data:
-            return_data["msg"] = "获取接口信息失败"
+        if not data or not isinstance(data, list):
+            return_data["msg"] = "获取接口信息失败或数据格式错误"
             return return_data
             
+        data, page_info = self._select_rows("jx3_dilujilu", data, page, {
+            "time": (lambda m: m.get("refresh_time") or 0, True),
+            "price": (lambda m: m.get("auction_amount") or 0, True),
+        })
+
         # 3. 处理返回数据 
         for item in data:
             item["refresh_time"] = datetime.fromtimestamp(item["refresh_time"]).strftime("%Y-%m-%d %H:%M:%S")
@@ -711,6 +1212,7 @@ class JX3Service:
             return return_data
         
         return_data["data"]["list"] = data
+        return_data["data"].update(page_info)
         return_data["code"] = 200
         
         return return_data
@@ -771,7 +1273,8 @@ class JX3Service:
         # 角色名片获取
         datamp = await self.jueshemingpian(server,name)
         if datamp["code"] == 200:
-            data["showAvatar"] = datamp['data']['showAvatar']
+            # 受 inline_timeout 限制，超时使用远程地址
+            data["showAvatar"] = (await self.inline_images([datamp['data']['showAvatar']]))[0]
             logger.info("名片获取完成")
         else:
             data["showAvatar"] = ""
@@ -838,7 +1341,7 @@ class JX3Service:
         return return_data
 
 
-    async def zhengyingpaimai(self, server: str, name: str) -> Dict[str, Any]:
+    async def zhengyingpaimai(self, server: str, name: str, page: int = 1) -> Dict[str, Any]:
         """阵营拍卖"""
         return_data = self._init_return_data()
         
@@ -850,10 +1353,15 @@ class JX3Service:
             "jx3_zhengyingpaimai", "GET", params=params
         )
         
-        if not data:
-            return_data["msg"] = "获取接口信息失败"
+        if not data or not isinstance(data, list):
+            return_data["msg"] = "获取接口信息失败或数据格式错误"
             return return_data
             
+        data, page_info = self._select_rows("jx3_zhengyingpaimai", data, page, {
+            "time": (lambda m: m.get("time") or 0, True),
+            "price": (lambda m: m.get("amount") or 0, True),
+        })
+
         # 3. 处理返回数据 
         for item in data:
             item["time"] = datetime.fromtimestamp(item["time"]).strftime("%Y-%m-%d %H:%M:%S")
@@ -867,6 +1375,7 @@ class JX3Service:
             return return_data
         
         return_data["data"]["list"] = data
+        return_data["data"].update(page_info)
         return_data["code"] = 200
         
         return return_data
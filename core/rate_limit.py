@@ -0,0 +1,101 @@
+import time
+import asyncio
+from typing import Dict, Tuple, Any
+
+
+class RateLimitExceeded(Exception):
+    """请求在截止时间内拿不到令牌时抛出"""
+
+
+class TokenBucket:
+    """
+    令牌桶限流
+
+    1. 按 rate (个/秒) 匀速生成令牌，桶容量为 burst。
+    2. 令牌不足时按先来后到排队，等待者数量受 max_waiters 限制。
+    3. 预计等待时间超过截止时间时立即失败，不会无限排队。
+    """
+
+    def __init__(self, rate: float, burst: int, max_waiters: int = 20):
+        self.rate = max(float(rate), 0.001)
+        self.burst = max(int(burst), 1)
+        self.max_waiters = max(int(max_waiters), 0)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters = 0
+        self.rejected = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, timeout: float):
+        """
+        获取一个令牌
+        :param timeout: 最长等待时间，单位秒
+        :raises RateLimitExceeded: 排队已满或在截止时间内无法获得令牌
+        """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        # 令牌不足：预占一个令牌 (允许为负)，负数部分即排在前面的请求
+        wait = (1 - self._tokens) / self.rate
+        if self._waiters >= self.max_waiters or wait > timeout:
+            self.rejected += 1
+            raise RateLimitExceeded(f"请求排队已满或预计等待 {wait:.1f}s 超过限制")
+
+        self._tokens -= 1
+        self._waiters += 1
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # 取消时归还预占的令牌
+            self._tokens += 1
+            raise
+        finally:
+            self._waiters -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "tokens": round(self._tokens, 2),
+            "waiters": self._waiters,
+            "rejected": self.rejected,
+        }
+
+
+class RateLimiter:
+    """按 (上游主机, token) 划分的令牌桶集合"""
+
+    def __init__(self, rate: float = 5, burst: int = 10, max_waiters: int = 20, timeout: float = 3):
+        self.rate = rate
+        self.burst = burst
+        self.max_waiters = max_waiters
+        self.timeout = timeout
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    async def acquire(self, host: str, token: str = ""):
+        bucket = self._buckets.get((host, token))
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, self.max_waiters)
+            self._buckets[(host, token)] = bucket
+        await bucket.acquire(self.timeout)
+
+    @staticmethod
+    def _mask(token: str) -> str:
+        """token 只保留首尾各两位"""
+        if not token:
+            return "无 token"
+        if len(token) <= 6:
+            return "***"
+        return f"{token[:2]}***{token[-2:]}"
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """每个令牌桶单独统计，键为 "主机 [脱敏 token]"，token 不完整展示"""
+        return {
+            f"{host} [{self._mask(token)}]": bucket.stats()
+            for (host, token), bucket in self._buckets.items()
+        }
@@ -0,0 +1,192 @@
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class RenderShed(Exception):
+    """渲染队列已满或预计无法在截止时间内完成，请求被丢弃"""
+
+
+class RenderScheduler:
+    """
+    渲染调度器
+
+    1. 同时进行的渲染数受 concurrency 限制。
+    2. 超出并发的请求进入有界队列，按 (优先级, 先来后到) 出队，数值越小越优先。
+    3. 每个请求带截止时间：队列已满、预计等待超过截止时间或等待超时都会立即丢弃。
+    4. 记录队列长度、等待时间与渲染耗时，便于观察负载。
+    """
+
+    def __init__(self, concurrency: int = 2, max_queue: int = 20, deadline: float = 15):
+        self.concurrency = max(int(concurrency), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.deadline = deadline
+        self._running = 0
+        # (优先级, 序号, future)
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # 统计
+        self.avg_render = 0.0
+        self.avg_wait = 0.0
+        self.max_wait = 0.0
+        self.completed = 0
+        self.shed = 0
+
+    def _estimate_wait(self) -> float:
+        """按平均渲染耗时估算新请求的排队时间"""
+        return (len(self._queue) + 1) / self.concurrency * self.avg_render
+
+    async def run(self, func: Callable[[], Awaitable[Any]], priority: int = 0, deadline: Optional[float] = None) -> Any:
+        """
+        在并发限制内执行渲染
+        :param priority: 优先级，数值越小越先执行
+        :param deadline: 最长等待时间 (秒)，默认使用调度器配置
+        :raises RenderShed: 请求被丢弃
+        """
+        deadline = self.deadline if deadline is None else deadline
+        start = time.monotonic()
+
+        if self._running >= self.concurrency or self._queue:
+            if len(self._queue) >= self.max_queue or self._estimate_wait() > deadline:
+                self.shed += 1
+                raise RenderShed(f"渲染队列繁忙 (排队 {len(self._queue)})")
+
+            future = asyncio.get_running_loop().create_future()
+            entry = (priority, next(self._seq), future)
+            heapq.heappush(self._queue, entry)
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=deadline)
+            except asyncio.TimeoutError:
+                self._discard(entry)
+                self.shed += 1
+                raise RenderShed(f"渲染等待超过 {deadline}s")
+            except asyncio.CancelledError:
+                self._discard(entry)
+                raise
+        else:
+            self._running += 1
+
+        waited = time.monotonic() - start
+        self.avg_wait = waited if not self.completed else self.avg_wait * 0.8 + waited * 0.2
+        self.max_wait = max(self.max_wait, waited)
+
+        try:
+            render_start = time.monotonic()
+            result = await func()
+            cost = time.monotonic() - render_start
+            self.avg_render = cost if not self.completed else self.avg_render * 0.8 + cost * 0.2
+            return result
+        finally:
+            self.completed += 1
+            self._release()
+
+    def _discard(self, entry: Tuple[int, int, asyncio.Future]):
+        """等待者放弃时移出队列；若名额已经转交给它，则转交给下一个"""
+        future = entry[2]
+        if future.done() and not future.cancelled():
+            self._release()
+            return
+        future.cancel()
+        try:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+        except ValueError:
+            pass
+
+    def _release(self):
+        """释放一个名额：直接转交给队首等待者，否则减少运行计数"""
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "concurrency": self.concurrency,
+            "queued": len(self._queue),
+            "max_queue": self.max_queue,
+            "avg_wait": round(self.avg_wait, 2),
+            "max_wait": round(self.max_wait, 2),
+            "avg_render": round(self.avg_render, 2),
+            "completed": self.completed,
+            "shed": self.shed,
+        }
+
+
+class RenderHealth:
+    """
+    渲染健康度
+
+    1. 记录最近 window 次渲染的耗时与成败。
+    2. 平均耗时或失败率超过阈值时进入降级状态，图片指令改为文字回复。
+    3. 降级期间每 probe_interval 秒放行一次渲染作为探测，探测成功且耗时正常即恢复。
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_samples: int = 5,
+        latency_threshold: float = 8.0,
+        error_threshold: float = 0.5,
+        probe_interval: float = 30
+    ):
+        self.min_samples = min_samples
+        self.latency_threshold = latency_threshold
+        self.error_threshold = error_threshold
+        self.probe_interval = probe_interval
+        # (耗时, 是否成功)
+        self._samples: deque = deque(maxlen=window)
+        self.degraded = False
+        self._probe_at = 0.0
+        self.degraded_count = 0
+
+    def _latency(self) -> float:
+        costs = [cost for cost, ok in self._samples if ok]
+        return sum(costs) / len(costs) if costs else 0.0
+
+    def _error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def should_render(self) -> bool:
+        """是否进行图片渲染，降级期间只放行探测请求"""
+        if not self.degraded:
+            return True
+        now = time.monotonic()
+        if now >= self._probe_at:
+            self._probe_at = now + self.probe_interval
+            return True
+        return False
+
+    def record(self, cost: float, ok: bool):
+        """记录一次渲染结果并更新降级状态"""
+        if self.degraded:
+            if ok and cost < self.latency_threshold:
+                # 探测成功，重新开始统计
+                self.degraded = False
+                self._samples.clear()
+            return
+
+        self._samples.append((cost, ok))
+        if len(self._samples) < self.min_samples:
+            return
+        if self._latency() > self.latency_threshold or self._error_rate() > self.error_threshold:
+            self.degraded = True
+            self.degraded_count += 1
+            self._probe_at = time.monotonic() + self.probe_interval
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "degraded": self.degraded,
+            "latency": round(self._latency(), 2),
+            "error_rate": round(self._error_rate(), 2),
+            "samples": len(self._samples),
+            "degraded_count": self.degraded_count,
+        }
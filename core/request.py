@@ -1,12 +1,88 @@
 # core/request.py
+import copy
 import json
+import random
+import hashlib
+import logging
 import aiohttp
+import aiofiles
 import asyncio
-from typing import Optional, Dict, Any, Union, List
-from aiohttp import ClientTimeout, ClientSession
+from pathlib import Path
+from urllib.parse import urlsplit
+from typing import Optional, Dict, Any, Union, List, Callable, Awaitable, AsyncIterator, Tuple
+from aiohttp import ClientTimeout, ClientSession, TCPConnector
 
 from astrbot.api import logger
 
+from .rate_limit import RateLimiter, RateLimitExceeded
+from .json_codec import json_loads, JSONDecodeError, LARGE_PAYLOAD_BYTES
+
+
+# 连接阶段超时 (aiohttp >= 3.10 才区分连接超时与读取超时)
+_CONNECT_TIMEOUT = getattr(aiohttp, "ConnectionTimeoutError", ())
+
+
+class UpstreamError(Exception):
+    """网络异常、超时或 5xx 等上游故障 (重试后仍失败)"""
+
+
+class PayloadTooLarge(Exception):
+    """二进制响应超过大小上限"""
+
+
+class _Call:
+    """SingleFlight 中一次进行中的请求"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    相同请求合并 (single-flight)
+
+    并发的相同请求只真正执行一次，其余调用方等待同一个结果：
+    1. 执行失败时异常会传递给所有等待者。
+    2. 单个等待者被取消不会取消共享的请求。
+    3. 结果被多个调用方共享时，每个调用方拿到的是独立的深拷贝。
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda t, k=key, c=call: self._done(k, c))
+            self.executed += 1
+        else:
+            self.shared += 1
+
+        call.waiters += 1
+        result = await asyncio.shield(call.task)
+        if call.waiters > 1 and not isinstance(result, (bytes, str)):
+            # 请求完成后不会再有新的等待者加入，waiters 此时已是最终值
+            return copy.deepcopy(result)
+        return result
+
+    def _done(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # 所有等待者都被取消时，避免出现 "exception was never retrieved"
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
 class APIClient:
     """
     API客户端类
@@ -15,25 +91,107 @@ class APIClient:
     1. 复用 aiohttp.ClientSession 以提高性能。
     2. 增加类型提示 (Type Hints)。
     3. 支持异步上下文管理器 (Async Context Manager)。
+    4. 并发的相同请求自动合并 (single-flight)。
+    5. 可配置连接池：总连接数、单主机连接数、DNS 缓存、keep-alive 及连接/读取超时。
+    6. 可选的令牌桶限流，只对真正发出的请求计数，被合并的请求不消耗额度。
+    7. 幂等的 GET 请求在连接失败/连接超时/5xx 时按带抖动的指数退避重试，所有尝试共用一个截止时间。
+    8. 二进制响应限制大小，并支持流式下载到文件。
     """
 
-    def __init__(self, base_timeout: int = 10, ssl_verify: bool = False):
+    def __init__(
+        self,
+        base_timeout: int = 10,
+        ssl_verify: bool = False,
+        single_flight: bool = True,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        ttl_dns_cache: int = 300,
+        keepalive_timeout: float = 30,
+        connect_timeout: Optional[float] = 5,
+        read_timeout: Optional[float] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 2,
+        retry_backoff: float = 0.3,
+        retry_backoff_max: float = 3,
+        retry_deadline: Optional[float] = None,
+        max_binary_bytes: int = 10 * 1024 * 1024
+    ):
         self.base_timeout = base_timeout
         self.ssl_verify = ssl_verify
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.rate_limiter = rate_limiter
+        self.max_retries = max(int(max_retries), 0)
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        # 默认与单次请求的总超时相同
+        self.retry_deadline = retry_deadline or base_timeout
+        self.max_binary_bytes = max_binary_bytes
         self._session: Optional[ClientSession] = None
+        self._connector: Optional[TCPConnector] = None
+        self._flight: Optional[SingleFlight] = SingleFlight() if single_flight else None
 
     async def get_session(self) -> ClientSession:
         """获取或创建单例 Session"""
         if self._session is None or self._session.closed:
-            timeout = ClientTimeout(total=self.base_timeout)
-            self._session = ClientSession(timeout=timeout)
+            timeout = ClientTimeout(
+                total=self.base_timeout,
+                connect=self.connect_timeout or None,
+                sock_read=self.read_timeout or None
+            )
+            # limit_per_host 让 jx3api 与剑侠查关两个上游各自拥有独立的连接上限，互不挤占
+            self._connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = ClientSession(timeout=timeout, connector=self._connector)
         return self._session
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        连接池快照
+        :return: 总体及按主机划分的 使用中(acquired)/空闲(idle)/等待中(acquiring) 连接数
+        """
+        stats: Dict[str, Any] = {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "acquired": 0,
+            "idle": 0,
+            "acquiring": 0,
+            "hosts": {}
+        }
+        connector = self._connector
+        if connector is None or connector.closed:
+            return stats
+
+        def host_stats(host: str) -> Dict[str, int]:
+            return stats["hosts"].setdefault(host, {"acquired": 0, "idle": 0, "acquiring": 0})
+
+        # 以下均为 aiohttp 连接器内部字段，不同版本可能缺失，取不到时按 0 处理
+        for key, conns in getattr(connector, "_conns", {}).items():
+            host_stats(key.host)["idle"] += len(conns)
+            stats["idle"] += len(conns)
+        for key, conns in getattr(connector, "_acquired_per_host", {}).items():
+            host_stats(key.host)["acquired"] += len(conns)
+        stats["acquired"] = len(getattr(connector, "_acquired", ()))
+        for key, waiters in getattr(connector, "_waiters", {}).items():
+            host_stats(key.host)["acquiring"] += len(waiters)
+            stats["acquiring"] += len(waiters)
+
+        return stats
+
     async def close(self):
         """关闭 Session"""
         if self._session and not self._session.closed:
             await self._session.close()
             self._session = None
+            self._connector = None
 
     async def __aenter__(self):
         await self.get_session()
@@ -42,65 +200,238 @@ class APIClient:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
 
-    async def _request(self, method: str, url: str, params: Optional[Dict] = None, json_data: Optional[Dict] = None) -> Any:
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        json_data: Optional[Dict] = None,
+        raise_errors: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+        with_meta: bool = False
+    ) -> Any:
         """
         统一的内部请求处理方法
+        :param raise_errors: 上游故障时抛出 UpstreamError 而不是返回 None，供熔断器区分故障与业务空数据
+        :param headers: 额外的请求头，如条件请求的 If-None-Match
+        :param with_meta: 为 True 时返回 (状态码, 数据, 校验信息)
+        :raises RateLimitExceeded: 启用限流且在截止时间内拿不到令牌
         """
-        session = await self.get_session()
         method = method.upper()
-        
-        # 记录日志
-        logger.debug(f"发起 {method} 请求: {url}")
-        if params: logger.debug(f"Query参数: {params}")
-        if json_data: logger.debug(f"Body数据: {json_data}")
+        send = lambda: self._send_with_retry(method, url, params, json_data, headers, with_meta)
 
         try:
-            # aiohttp 会自动处理 json=json_data 时的 Content-Type
-            async with session.request(
-                method=method,
-                url=url,
-                params=params,
-                json=json_data,
-                ssl=self.ssl_verify
-            ) as response:
-                return await self._handle_response(response)
+            if self._flight is None:
+                return await send()
+
+            key = self._flight_key(method, url, params, json_data, headers, with_meta)
+            return await self._flight.do(key, send)
+
+        except RateLimitExceeded:
+            raise
                 
-        except aiohttp.ClientError as e:
-            logger.error(f"网络请求出错 ({method} {url}): {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"网络请求出错 ({method} {url}): {e!r}")
+            if raise_errors:
+                raise UpstreamError(f"{method} {url}: {e!r}") from e
             return None
         except Exception as e:
             logger.error(f"未知错误 ({method} {url}): {e}")
             return None
 
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """
+        连接失败、连接超时、429 及 5xx 可以重试
+        总超时或读取超时说明上游已挂起，重试只会让调用方多等几个超时周期；其余 4xx 重试也没有意义
+        """
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status == 429 or error.status >= 500
+        if isinstance(error, asyncio.TimeoutError):
+            return isinstance(error, _CONNECT_TIMEOUT)
+        return isinstance(error, aiohttp.ClientConnectionError)
+
+    async def _send_with_retry(self, method: str, url: str, *args) -> Any:
+        """
+        GET 请求失败时按带抖动的指数退避重试，POST 不重试
+        所有尝试共用 retry_deadline 截止时间，重试不会让总耗时超过该时间
+        """
+        retries = self.max_retries if method == "GET" else 0
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.retry_deadline
+        attempt = 0
+        while True:
+            try:
+                if attempt == 0:
+                    return await self._send(method, url, *args)
+                return await asyncio.wait_for(self._send(method, url, *args), deadline - loop.time())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= retries or not self._is_retryable(e):
+                    raise
+                # full jitter：在 [0, base * 2^attempt] 内随机等待
+                delay = random.uniform(0, min(self.retry_backoff_max, self.retry_backoff * (2 ** attempt)))
+                if loop.time() + delay >= deadline:
+                    raise
+                attempt += 1
+                logger.warning(f"请求失败，{delay:.2f}s 后第 {attempt} 次重试 ({method} {url}): {e!r}")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _flight_key(method: str, url: str, *args) -> str:
+        """生成请求合并的键：方法 + URL + 规范化后的参数"""
+        return json.dumps(
+            [method, url, *args],
+            ensure_ascii=False, sort_keys=True, default=str
+        )
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        json_data: Optional[Dict] = None,
+        headers: Optional[Dict[str, str]] = None,
+        with_meta: bool = False
+    ) -> Any:
+        """真正发起 HTTP 请求，网络异常向上抛出"""
+        if self.rate_limiter is not None:
+            token = (params or json_data or {}).get("token", "")
+            await self.rate_limiter.acquire(urlsplit(url).netloc, token)
+
+        session = await self.get_session()
+        
+        # 记录日志，未开启 DEBUG 时不做字符串格式化
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"发起 {method} 请求: {url}")
+            if params: logger.debug(f"Query参数: {params}")
+            if json_data: logger.debug(f"Body数据: {json_data}")
+
+        # aiohttp 会自动处理 json=json_data 时的 Content-Type
+        async with session.request(
+            method=method,
+            url=url,
+            params=params,
+            json=json_data,
+            headers=headers,
+            ssl=self.ssl_verify
+        ) as response:
+            if not with_meta:
+                return await self._handle_response(response)
+
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            if response.status == 304:
+                return 304, None, validators
+            return response.status, await self._handle_response(response), validators
+
+    def stats(self) -> Dict[str, int]:
+        """请求合并统计"""
+        if self._flight is None:
+            return {"executed": 0, "shared": 0, "inflight": 0}
+        return {
+            "executed": self._flight.executed,
+            "shared": self._flight.shared,
+            "inflight": len(self._flight),
+        }
+
     async def _handle_response(self, response: aiohttp.ClientResponse) -> Any:
         """处理响应：自动识别二进制或JSON"""
+        logger.debug(f"响应状态: {response.status}")
         try:
-            logger.debug(f"响应状态: {response.status}")
             response.raise_for_status()
+        except aiohttp.ClientResponseError as e:
+            if self._is_retryable(e):
+                # 429/5xx 交给上层重试和熔断
+                raise
+            logger.error(f"HTTP响应错误: {e}")
+            return None
 
-            content_type = response.headers.get('Content-Type', '').lower()
-
-            if 'image' in content_type or 'octet-stream' in content_type:
-                return await response.read()
+        content_type = response.headers.get('Content-Type', '').lower()
 
+        if 'image' in content_type or 'octet-stream' in content_type:
             try:
-                data = await response.json()
-            except Exception:
-                text = await response.text()
-                try:
-                    loop = asyncio.get_running_loop()
-                    data = await loop.run_in_executor(None, json.loads, text)
-                except json.JSONDecodeError:
-                    logger.error(f"无法解析响应为 JSON。原始内容: {text[:100]}...")
-                    return None
+                return await self._read_capped(response, self.max_binary_bytes)
+            except PayloadTooLarge as e:
+                logger.error(f"二进制响应过大，已丢弃: {e}")
+                return None
+
+        # 只读取一次响应体并只解析一次
+        body = await response.read()
+        charset = (response.charset or "utf-8").lower()
+        payload = body if charset in ("utf-8", "utf8") else body.decode(charset, errors="replace")
+
+        try:
+            if len(body) > LARGE_PAYLOAD_BYTES:
+                loop = asyncio.get_running_loop()
+                data = await loop.run_in_executor(None, json_loads, payload)
+            else:
+                data = json_loads(payload)
+        except JSONDecodeError:
+            logger.error(f"无法解析响应为 JSON。原始内容: {body[:100].decode('utf-8', errors='replace')}...")
+            return None
 
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"响应数据: {data}")
-            return self._validate_api_payload(data)
+        return self._validate_api_payload(data)
 
-        except aiohttp.ClientError as e:
-            logger.error(f"HTTP响应错误: {e}")
+    @staticmethod
+    async def _read_capped(response: aiohttp.ClientResponse, max_bytes: int) -> bytes:
+        """分块读取响应体，超过 max_bytes 立即中止"""
+        if response.content_length and response.content_length > max_bytes:
+            raise PayloadTooLarge(f"{response.content_length} > {max_bytes}")
+
+        buffer = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            buffer.extend(chunk)
+            if len(buffer) > max_bytes:
+                raise PayloadTooLarge(f"> {max_bytes}")
+        return bytes(buffer)
+
+    async def download(self, url: str, dest: Path, max_bytes: Optional[int] = None) -> Optional[tuple]:
+        """
+        流式下载文件
+        边下载边写入 dest 并计算 sha256，超过大小上限立即中止并删除半成品
+        :return: (sha256, 字节数, Content-Type)，失败返回 None
+        """
+        max_bytes = max_bytes or self.max_binary_bytes
+        session = await self.get_session()
+        digest = hashlib.sha256()
+        size = 0
+        completed = False
+
+        try:
+            async with session.get(url, ssl=self.ssl_verify) as response:
+                response.raise_for_status()
+                if response.content_length and response.content_length > max_bytes:
+                    raise PayloadTooLarge(f"{response.content_length} > {max_bytes}")
+
+                async with aiofiles.open(dest, "wb") as f:
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise PayloadTooLarge(f"> {max_bytes}")
+                        digest.update(chunk)
+                        await f.write(chunk)
+
+                content_type = response.headers.get("Content-Type", "")
+                completed = True
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, PayloadTooLarge, OSError) as e:
+            logger.error(f"下载文件失败 ({url}): {e!r}")
             return None
 
+        finally:
+            # 失败或被取消时删除半成品
+            if not completed:
+                try:
+                    dest.unlink()
+                except OSError:
+                    pass
+
+        return digest.hexdigest(), size, content_type
+
     def _validate_api_payload(self, data: Any) -> Any:
         """校验业务层面的 JSON 数据结构"""
         if not data:
@@ -110,8 +441,8 @@ class APIClient:
         # 如果返回的是 JSON 字符串而非对象，再次解析
         if isinstance(data, str):
             try:
-                data = json.loads(data)
-            except json.JSONDecodeError:
+                data = json_loads(data)
+            except JSONDecodeError:
                 return None
         
         if isinstance(data, dict) and 'code' in data:
@@ -124,16 +455,46 @@ class APIClient:
         
         return data
 
-    async def get(self, url: str, params: Optional[Dict] = None, out_key: Optional[str] = None) -> Any:
+    async def get(self, url: str, params: Optional[Dict] = None, out_key: Optional[str] = None, raise_errors: bool = False) -> Any:
         """GET 请求封装"""
-        data = await self._request('GET', url, params=params)
+        data = await self._request('GET', url, params=params, raise_errors=raise_errors)
         return self._extract_data(data, out_key)
 
-    async def post(self, url: str, data: Optional[Dict] = None, out_key: Optional[str] = None) -> Any:
+    async def post(self, url: str, data: Optional[Dict] = None, out_key: Optional[str] = None, raise_errors: bool = False) -> Any:
         """POST 请求封装 (默认发送 JSON)"""
-        data = await self._request('POST', url, json_data=data)
+        data = await self._request('POST', url, json_data=data, raise_errors=raise_errors)
         return self._extract_data(data, out_key)
 
+    async def get_conditional(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        out_key: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        raise_errors: bool = False
+    ) -> Tuple[int, Any, Dict[str, Optional[str]]]:
+        """
+        条件 GET 请求
+        携带 If-None-Match / If-Modified-Since，上游内容未变化时返回 304 且不传输响应体
+        :return: (状态码, 提取后的数据, {"etag", "last_modified"})，请求失败时状态码为 0
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        result = await self._request(
+            'GET', url, params=params, raise_errors=raise_errors,
+            headers=headers or None, with_meta=True
+        )
+        if result is None:
+            return 0, None, {}
+
+        status, data, validators = result
+        return status, self._extract_data(data, out_key), validators
+
     def _extract_data(self, data: Any, key: Optional[str]) -> Any:
         """辅助方法：从结果中提取指定字段"""
         if data is None:
@@ -151,31 +512,30 @@ class APIClient:
         params_data: Optional[Dict] = None, 
         out_key: str = "", 
         list_key: str = "list", 
-        max_pages: int = 10
+        max_pages: int = 10,
+        concurrency: int = 1,
+        pages_key: Optional[str] = None
     ) -> List[Any]:
         """
         分页获取所有数据
         :param method: GET 或 POST
         :param list_key: 列表数据在 JSON 中的字段名，如 'data' 或 'list'
+        :param concurrency: 并发获取的页数，>1 时先取第 1 页，再并发获取剩余页面
+        :param pages_key: 总页数在 JSON 中的字段名，未提供时以 max_pages 作为上限
         """
+        if concurrency > 1:
+            return [
+                item async for item in self.iter_pages(
+                    method, url, params_data, out_key, list_key, max_pages, concurrency, pages_key
+                )
+            ]
+
         all_data = []
         current_page = 1
         params = params_data.copy() if params_data else {}
 
         while True:
-            params["page"] = str(current_page)
-            
-            if method.upper() == "POST":
-                data = await self.post(url, data=params, out_key=out_key)
-            else:
-                data = await self.get(url, params=params, out_key=out_key)
-
-            # 终止条件判断
-            if not data or isinstance(data, bytes):
-                break
-            
-            # 如果 data 是列表本身（有些API直接返回列表）
-            page_items = data if isinstance(data, list) else data.get(list_key)
+            page_items, _ = await self._fetch_page(method, url, params, current_page, out_key, list_key)
             
             if not page_items:
                 break
@@ -188,4 +548,106 @@ class APIClient:
             current_page += 1
             logger.info(f"已获取第 {current_page} 页数据")
 
-        return all_data
\ No newline at end of file
+        return all_data
+
+    async def iter_pages(
+        self,
+        method: str,
+        url: str,
+        params_data: Optional[Dict] = None,
+        out_key: str = "",
+        list_key: str = "list",
+        max_pages: int = 10,
+        concurrency: int = 4,
+        pages_key: Optional[str] = None
+    ) -> AsyncIterator[Any]:
+        """
+        并发分页获取，按页码顺序逐条产出数据
+        遇到空页后立即取消其后仍在进行的请求
+        """
+        params = params_data.copy() if params_data else {}
+
+        first_items, total_pages = await self._fetch_page(method, url, params, 1, out_key, list_key, pages_key)
+        if not first_items:
+            return
+        for item in first_items:
+            yield item
+
+        last_page = min(max_pages, total_pages or max_pages)
+        if last_page <= 1:
+            return
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        stop_at = last_page + 1  # 第一个空页的页码
+        tasks: Dict[int, asyncio.Task] = {}
+
+        async def fetch(page: int) -> Optional[List[Any]]:
+            nonlocal stop_at
+            async with semaphore:
+                if page > stop_at:
+                    return None
+                items, _ = await self._fetch_page(method, url, params, page, out_key, list_key)
+            if not items and page < stop_at:
+                stop_at = page
+                for p, t in tasks.items():
+                    if p > page and not t.done():
+                        t.cancel()
+            return items
+
+        for page in range(2, last_page + 1):
+            tasks[page] = asyncio.create_task(fetch(page))
+
+        try:
+            for page in range(2, last_page + 1):
+                # 排在空页之后的页面已被取消，不再等待
+                if page > stop_at:
+                    break
+                items = await tasks[page]
+                if not items:
+                    break
+                logger.info(f"已获取第 {page} 页数据")
+                for item in items:
+                    yield item
+        finally:
+            for t in tasks.values():
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    async def _fetch_page(
+        self,
+        method: str,
+        url: str,
+        params: Dict,
+        page: int,
+        out_key: str,
+        list_key: str,
+        pages_key: Optional[str] = None
+    ) -> Tuple[List[Any], Optional[int]]:
+        """
+        获取单页数据
+        :return: (当前页列表, 总页数)，终止条件 (失败/二进制/空页) 返回空列表
+        """
+        page_params = dict(params, page=str(page))
+
+        if method.upper() == "POST":
+            data = await self.post(url, data=page_params, out_key=out_key)
+        else:
+            data = await self.get(url, params=page_params, out_key=out_key)
+
+        # 终止条件判断
+        if not data or isinstance(data, bytes):
+            return [], None
+
+        # 如果 data 是列表本身（有些API直接返回列表）
+        if isinstance(data, list):
+            return data, None
+
+        total_pages = None
+        if pages_key:
+            try:
+                total_pages = int(data.get(pages_key))
+            except (TypeError, ValueError):
+                total_pages = None
+
+        return data.get(list_key) or [], total_pages
@@ -0,0 +1,356 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from astrbot.api import logger
+
+from .json_codec import json_loads, json_dumps, JSONDecodeError
+
+
+# (监控键, 服务器)，不区分服务器的监控使用空字符串
+StateKey = Tuple[str, str]
+
+
+class StateStore(ABC):
+    """
+    写回式监控状态存储
+
+    1. 启动时读取一次，之后读写都在内存中完成，按 (监控键, 服务器) 直接查找。
+    2. 写入只标记脏键，延迟 flush_delay 秒后合并为一次落盘。
+    3. 状态变化记录为一条转换历史 (旧值 -> 新值)，由支持历史的后端保存。
+    4. 子类实现 _read_sync / _snapshot / _write_sync 决定落盘格式。
+    """
+
+    def __init__(self, flush_delay: float = 2.0):
+        self.flush_delay = flush_delay
+        self._states: Dict[StateKey, Any] = {}
+        self._cursors: Dict[StateKey, Any] = {}
+        self._dirty_states: Set[StateKey] = set()
+        self._dirty_cursors: Set[StateKey] = set()
+        # (监控键, 服务器, 旧值, 新值, 时间)
+        self._transitions: List[tuple] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self.flushes = 0
+
+    """===================== 读写 ====================="""
+
+    def get(self, key: str, default=None, server: str = ""):
+        return self._states.get((key, server), default)
+
+    def set(self, key: str, value, server: str = ""):
+        """更新监控状态，延迟批量落盘"""
+        old = self._states.get((key, server))
+        if old != value:
+            self._transitions.append((key, server, old, value, time.time()))
+        self._states[(key, server)] = value
+        self._dirty_states.add((key, server))
+        self._schedule_flush()
+
+    def get_cursor(self, key: str, default=None, server: str = ""):
+        return self._cursors.get((key, server), default)
+
+    def set_cursor(self, key: str, value, server: str = ""):
+        """更新最后读取位置 (如最后一条新闻)，不记录历史"""
+        self._cursors[(key, server)] = value
+        self._dirty_cursors.add((key, server))
+        self._schedule_flush()
+
+    async def history(self, key: str, server: str = "", limit: int = 10) -> List[Dict[str, Any]]:
+        """最近的状态转换记录，后端不保存历史时返回空列表"""
+        return []
+
+    """===================== 落盘 ====================="""
+
+    @abstractmethod
+    def _read_sync(self) -> Tuple[Dict[StateKey, Any], Dict[StateKey, Any]]:
+        """读取全部 (状态, 读取位置)，在线程池中执行"""
+
+    @abstractmethod
+    def _snapshot(self, states: Dict[StateKey, Any], cursors: Dict[StateKey, Any], transitions: List[tuple]):
+        """在事件循环线程中准备写入内容，避免写入期间数据被修改"""
+
+    @abstractmethod
+    def _write_sync(self, payload):
+        """写入 _snapshot 准备的内容，在线程池中执行"""
+
+    def _close_sync(self):
+        pass
+
+    def _schedule_flush(self):
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def load(self):
+        """读取已保存的状态到内存"""
+        loop = asyncio.get_running_loop()
+        try:
+            self._states, self._cursors = await loop.run_in_executor(None, self._read_sync)
+        except (OSError, sqlite3.Error, json.JSONDecodeError) as e:
+            logger.error(f"读取监控状态失败：{e}")
+            self._states, self._cursors = {}, {}
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        # 已开始的写入不随定时任务一起取消
+        await asyncio.shield(self.flush())
+
+    async def flush(self):
+        """将脏数据写入存储"""
+        async with self._write_lock:
+            if not (self._dirty_states or self._dirty_cursors or self._transitions):
+                return
+            dirty_states, self._dirty_states = self._dirty_states, set()
+            dirty_cursors, self._dirty_cursors = self._dirty_cursors, set()
+            transitions, self._transitions = self._transitions, []
+            payload = self._snapshot(
+                {k: self._states[k] for k in dirty_states},
+                {k: self._cursors[k] for k in dirty_cursors},
+                transitions
+            )
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._write_sync, payload)
+                self.flushes += 1
+            except (OSError, sqlite3.Error) as e:
+                # 下次落盘时重试
+                self._dirty_states |= dirty_states
+                self._dirty_cursors |= dirty_cursors
+                self._transitions = transitions + self._transitions
+                logger.error(f"监控状态写入失败：{e}")
+
+    async def close(self):
+        """取消延迟任务并立即落盘"""
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(None, self._close_sync)
+
+
+class JsonStateStore(StateStore):
+    """
+    JSON 文件后端
+
+    文件顶层为 {监控键: 状态}，按服务器区分的状态保存为 "监控键@服务器"，
+    读取位置保存在 "_cursors" 下；不保存转换历史。
+    写入使用临时文件 + 重命名，进程崩溃时不会留下写了一半的 JSON。
+    """
+
+    CURSORS = "_cursors"
+
+    def __init__(self, path: Path, flush_delay: float = 2.0):
+        super().__init__(flush_delay)
+        self.path = Path(path)
+
+    @staticmethod
+    def encode_key(key: StateKey) -> str:
+        name, server = key
+        return f"{name}@{server}" if server else name
+
+    @staticmethod
+    def decode_key(text: str) -> StateKey:
+        name, _, server = text.partition("@")
+        return name, server
+
+    def _read_sync(self):
+        if not self.path.exists():
+            return {}, {}
+        content = self.path.read_text(encoding="utf-8")
+        data = json.loads(content) if content else {}
+        cursors = data.pop(self.CURSORS, {})
+        return (
+            {self.decode_key(k): v for k, v in data.items()},
+            {self.decode_key(k): v for k, v in cursors.items()},
+        )
+
+    def _snapshot(self, states, cursors, transitions) -> str:
+        # 文件整体重写，序列化全部数据
+        data: Dict[str, Any] = {self.encode_key(k): v for k, v in self._states.items()}
+        if self._cursors:
+            data[self.CURSORS] = {self.encode_key(k): v for k, v in self._cursors.items()}
+        return json.dumps(data, ensure_ascii=False, indent=4)
+
+    def _write_sync(self, content: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class SqliteStateStore(StateStore):
+    """
+    SQLite 后端 (WAL 模式)
+
+    1. monitor_state / cursors 以 (monitor_key, server) 为主键，history 按 (monitor_key, server, changed_at) 建索引。
+    2. 首次启动时从旧的 JSON 状态文件迁移一次，迁移标记保存在 meta 表。
+    3. sqlite3 为同步接口，所有操作放到线程池执行。
+    4. 每个 (monitor_key, server) 只保留最近 history_limit 条转换历史，清理与写入在同一事务中完成。
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        json_path: Optional[Path] = None,
+        flush_delay: float = 2.0,
+        history_limit: int = 100
+    ):
+        super().__init__(flush_delay)
+        self.history_limit = history_limit
+        self.db_path = Path(db_path)
+        self.json_path = Path(json_path) if json_path else None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS monitor_state (
+                    monitor_key TEXT NOT NULL,
+                    server TEXT NOT NULL DEFAULT '',
+                    value BLOB,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (monitor_key, server)
+                );
+                CREATE TABLE IF NOT EXISTS cursors (
+                    monitor_key TEXT NOT NULL,
+                    server TEXT NOT NULL DEFAULT '',
+                    cursor BLOB,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (monitor_key, server)
+                );
+                CREATE TABLE IF NOT EXISTS history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    monitor_key TEXT NOT NULL,
+                    server TEXT NOT NULL DEFAULT '',
+                    old_value BLOB,
+                    new_value BLOB,
+                    changed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_history_key_server
+                    ON history (monitor_key, server, changed_at);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _load_value(raw):
+        if raw is None:
+            return None
+        try:
+            return json_loads(raw)
+        except JSONDecodeError:
+            return None
+
+    def _migrate_json(self, conn: sqlite3.Connection):
+        """从 JSON 状态文件迁移一次"""
+        done = conn.execute("SELECT value FROM meta WHERE key = 'migrated_json'").fetchone()
+        if done or self.json_path is None or not self.json_path.exists():
+            return
+
+        states, cursors = JsonStateStore(self.json_path)._read_sync()
+        now = time.time()
+        conn.executemany(
+            "INSERT OR IGNORE INTO monitor_state (monitor_key, server, value, updated_at) VALUES (?, ?, ?, ?)",
+            [(k, s, json_dumps(v), now) for (k, s), v in states.items()]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO cursors (monitor_key, server, cursor, updated_at) VALUES (?, ?, ?, ?)",
+            [(k, s, json_dumps(v), now) for (k, s), v in cursors.items()]
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_json', ?)", (str(now),))
+        conn.commit()
+        logger.info(f"已从 {self.json_path.name} 迁移 {len(states)} 条监控状态")
+
+    def _read_sync(self):
+        with self._lock:
+            conn = self._connect()
+            self._migrate_json(conn)
+            states = {
+                (k, s): self._load_value(v)
+                for k, s, v in conn.execute("SELECT monitor_key, server, value FROM monitor_state")
+            }
+            cursors = {
+                (k, s): self._load_value(v)
+                for k, s, v in conn.execute("SELECT monitor_key, server, cursor FROM cursors")
+            }
+        return states, cursors
+
+    def _snapshot(self, states, cursors, transitions):
+        now = time.time()
+        return (
+            [(k, s, json_dumps(v), now) for (k, s), v in states.items()],
+            [(k, s, json_dumps(v), now) for (k, s), v in cursors.items()],
+            [(k, s, json_dumps(old), json_dumps(new), at) for k, s, old, new, at in transitions],
+        )
+
+    def _write_sync(self, payload):
+        states, cursors, transitions = payload
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO monitor_state (monitor_key, server, value, updated_at) VALUES (?, ?, ?, ?)",
+                    states
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cursors (monitor_key, server, cursor, updated_at) VALUES (?, ?, ?, ?)",
+                    cursors
+                )
+                conn.executemany(
+                    "INSERT INTO history (monitor_key, server, old_value, new_value, changed_at) VALUES (?, ?, ?, ?, ?)",
+                    transitions
+                )
+                if self.history_limit > 0:
+                    conn.executemany(
+                        "DELETE FROM history WHERE monitor_key = ? AND server = ? AND id NOT IN ("
+                        "SELECT id FROM history WHERE monitor_key = ? AND server = ? "
+                        "ORDER BY changed_at DESC, id DESC LIMIT ?)",
+                        [(k, s, k, s, self.history_limit) for k, s in {(t[0], t[1]) for t in transitions}]
+                    )
+
+    def _history_sync(self, key: str, server: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT old_value, new_value, changed_at FROM history "
+                "WHERE monitor_key = ? AND server = ? ORDER BY changed_at DESC LIMIT ?",
+                (key, server, limit)
+            ).fetchall()
+        return [
+            {"old": self._load_value(old), "new": self._load_value(new), "changed_at": at}
+            for old, new, at in rows
+        ]
+
+    async def history(self, key: str, server: str = "", limit: int = 10) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self._history_sync, key, server, limit)
+        except sqlite3.Error as e:
+            logger.error(f"读取监控历史失败：{e}")
+            return []
+
+    def _close_sync(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
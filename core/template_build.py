@@ -0,0 +1,126 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+
+_STYLE_RE = re.compile(r"(<style[^>]*>)(.*?)(</style>)", re.S | re.I)
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_JINJA_RE = re.compile(r"\{[{%#]")
+
+# class / id 属性中直接输出变量 (如 class="card {{ item.status }}")，无法静态判断用到的选择器
+_DYNAMIC_ATTR_RE = re.compile(r"""\b(?:class|id)\s*=\s*(["'])[^"']*\{\{[^'"}]*\}\}""", re.I)
+_SELECTOR_TOKEN_RE = re.compile(r"[.#]((?:[\w-]|\\.)+)")
+
+_EXTERNAL_RE = re.compile(
+    r"""(?:\b(?:src|href)\s*=\s*["']?|url\(\s*["']?|@import\s+["'])((?:https?:)?//[^"')\s>]+)""",
+    re.I
+)
+_DYNAMIC_IMG_RE = re.compile(r"""<img\b[^>]*\bsrc\s*=\s*["']?\s*\{\{""", re.I)
+
+
+def _match_brace(css: str, start: int) -> int:
+    """返回与 start 处 { 配对的 } 位置，不完整时返回 -1"""
+    depth = 0
+    for i in range(start, len(css)):
+        if css[i] == "{":
+            depth += 1
+        elif css[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def _selector_used(selector: str, markup: str) -> bool:
+    """选择器中出现的 class / id 全部能在模板中找到时视为使用中"""
+    if "[" in selector:
+        return True
+    for token in _SELECTOR_TOKEN_RE.findall(selector):
+        if not re.search(rf"(?<![\w-]){re.escape(token)}(?![\w-])", markup):
+            return False
+    return True
+
+
+def _strip_unused(css: str, markup: str) -> Tuple[str, int]:
+    """删除未使用的规则，返回 (css, 删除的选择器数)"""
+    out: List[str] = []
+    removed = 0
+    i = 0
+    while i < len(css):
+        brace = css.find("{", i)
+        if brace == -1:
+            out.append(css[i:])
+            break
+        end = _match_brace(css, brace)
+        if end == -1:
+            # 结构不完整，剩余部分原样保留
+            out.append(css[i:])
+            break
+
+        prelude = css[i:brace].strip()
+        body = css[brace + 1:end]
+        if prelude.startswith(("@media", "@supports")):
+            inner, count = _strip_unused(body, markup)
+            removed += count
+            if inner.strip():
+                out.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            # @font-face、@keyframes 等保持原样
+            out.append(css[i:end + 1])
+        else:
+            selectors = [s.strip() for s in prelude.split(",")]
+            used = [s for s in selectors if _selector_used(s, markup)]
+            removed += len(selectors) - len(used)
+            if used:
+                out.append(f"{','.join(used)}{{{body}}}")
+        i = end + 1
+    return "".join(out), removed
+
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_html(html: str) -> str:
+    """去掉 HTML 注释与行首缩进、空行，不改变标签之间是否有空白"""
+    html = _HTML_COMMENT_RE.sub("", html)
+    if re.search(r"<(pre|textarea)\b", html, re.I):
+        return html
+    lines = (line.strip() for line in html.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def build_template(source: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    模板构建：压缩 HTML / CSS，删除未使用的 CSS 规则，统计外部资源
+    Jinja 标签不做任何改写；含 Jinja 标签的 <style> 块原样保留
+    :return: (构建后的模板, 报告)
+    """
+    markup = _STYLE_RE.sub("", source)
+    can_strip = _DYNAMIC_ATTR_RE.search(markup) is None
+    removed = 0
+
+    def _style(match: "re.Match") -> str:
+        nonlocal removed
+        open_tag, css, close_tag = match.groups()
+        if _JINJA_RE.search(css):
+            return match.group(0)
+        css = minify_css(css)
+        if can_strip:
+            css, count = _strip_unused(css, markup)
+            removed += count
+        return f"{open_tag}{css}{close_tag}"
+
+    built = minify_html(_STYLE_RE.sub(_style, source))
+    report = {
+        "source_bytes": len(source.encode("utf-8")),
+        "bytes": len(built.encode("utf-8")),
+        "removed_selectors": removed,
+        "external": sorted(set(_EXTERNAL_RE.findall(source))),
+        "dynamic_images": len(_DYNAMIC_IMG_RE.findall(source)),
+    }
+    return built, report
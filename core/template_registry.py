@@ -0,0 +1,154 @@
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from astrbot.api import logger
+
+from .template_build import build_template
+
+# jinja2 随 AstrBot 安装，仅用于启动时校验模板语法，缺失时跳过校验
+try:
+    import jinja2
+except ImportError:  # pragma: no cover
+    jinja2 = None
+
+
+class TemplateRegistry:
+    """
+    内存模板注册表
+
+    1. 启动时一次性读取并校验 templates/ 下的全部模板，之后直接从内存返回。
+    2. 缺少必需模板或模板语法错误时在启动阶段报错，而不是等到查询时。
+    3. 开发模式下按文件修改时间热重载 (每个模板最多每 reload_interval 秒检查一次)。
+    4. 加载时压缩模板并删除未使用的 CSS 规则，记录体积并提示超出预算或引用外部资源的模板。
+    """
+
+    def __init__(
+        self,
+        template_dir: Path,
+        watch: bool = False,
+        reload_interval: float = 1.0,
+        build: bool = True,
+        budget_bytes: int = 8 * 1024
+    ):
+        self.template_dir = Path(template_dir)
+        self.watch = watch
+        self.reload_interval = reload_interval
+        self.build = build
+        self.budget_bytes = budget_bytes
+        # name -> (内容, 文件修改时间, 上次检查时间)
+        self._templates: Dict[str, Tuple[str, float, float]] = {}
+        # name -> 构建报告
+        self._reports: Dict[str, Dict[str, Any]] = {}
+        self._env = jinja2.Environment() if jinja2 is not None else None
+
+    def _read(self, name: str) -> str:
+        path = self.template_dir / name
+        if not path.exists():
+            raise FileNotFoundError(f"模板文件不存在: {path}")
+
+        source = path.read_text(encoding="utf-8")
+        if self._env is not None:
+            try:
+                self._env.parse(source)
+            except jinja2.TemplateSyntaxError as e:
+                raise ValueError(f"模板语法错误 {name} 第 {e.lineno} 行: {e.message}") from e
+
+        if self.build:
+            source = self._build(name, source)
+
+        self._templates[name] = (source, path.stat().st_mtime, time.monotonic())
+        return source
+
+    def _build(self, name: str, source: str) -> str:
+        """压缩模板，构建结果无法解析时退回原模板"""
+        built, report = build_template(source)
+        if self._env is not None:
+            try:
+                self._env.parse(built)
+            except jinja2.TemplateSyntaxError as e:
+                logger.error(f"模板构建结果无效，使用原模板 {name}: {e.message}")
+                return source
+
+        self._reports[name] = report
+        if report["bytes"] > self.budget_bytes:
+            logger.warning(f"模板 {name} 构建后 {report['bytes']} 字节，超出预算 {self.budget_bytes} 字节")
+        if report["external"]:
+            logger.warning(f"模板 {name} 引用外部资源，渲染时需联网获取: {', '.join(report['external'])}")
+        if report["dynamic_images"]:
+            logger.debug(f"模板 {name} 含 {report['dynamic_images']} 处由数据决定地址的图片")
+        return built
+
+    def load_all(self, required: Iterable[str] = ()):
+        """
+        加载目录下全部模板 (同步方法，建议在线程池中调用)
+        :raises FileNotFoundError: 缺少必需模板
+        :raises ValueError: 模板语法错误
+        """
+        for path in sorted(self.template_dir.glob("*.html")):
+            self._read(path.name)
+
+        missing = [name for name in required if name not in self._templates]
+        if missing:
+            raise FileNotFoundError(f"缺少模板文件: {', '.join(missing)}")
+
+        logger.info(f"模板加载完成，共 {len(self._templates)} 个")
+        if self._reports:
+            before = sum(r["source_bytes"] for r in self._reports.values())
+            after = sum(r["bytes"] for r in self._reports.values())
+            logger.info(f"模板构建完成，总大小 {before} -> {after} 字节")
+
+    def get(self, name: str) -> str:
+        """
+        获取模板内容
+        :raises FileNotFoundError: 模板不存在
+        """
+        entry = self._templates.get(name)
+        if entry is None:
+            # 未预加载 (如新增模板) 时读取一次
+            return self._read(name)
+
+        source, mtime, checked_at = entry
+        if self.watch and time.monotonic() - checked_at >= self.reload_interval:
+            source = self._reload_if_changed(name, source, mtime)
+        return source
+
+    def _reload_if_changed(self, name: str, source: str, mtime: float) -> str:
+        path = self.template_dir / name
+        try:
+            current = path.stat().st_mtime
+        except OSError:
+            # 文件被删除时继续使用内存中的版本
+            return source
+
+        if current == mtime:
+            self._templates[name] = (source, mtime, time.monotonic())
+            return source
+
+        try:
+            source = self._read(name)
+            logger.info(f"模板已热重载: {name}")
+        except (OSError, ValueError) as e:
+            logger.error(f"模板热重载失败，继续使用旧版本: {e}")
+            self._templates[name] = (source, mtime, time.monotonic())
+        return source
+
+    def name_of(self, source: str) -> Optional[str]:
+        """根据模板内容反查模板名"""
+        for name, (text, _, _) in self._templates.items():
+            if text is source or text == source:
+                return name
+        return None
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """各模板的构建报告：原始大小、构建后大小、删除的选择器数、外部资源"""
+        return dict(self._reports)
+
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self._templates)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+
+templates = TemplateRegistry(Path(__file__).parent.parent / "templates")
@@ -0,0 +1,141 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from astrbot.api import logger
+
+
+# 文字摘要最多列出的行数
+MAX_ROWS = 10
+
+
+def _rows(items: Iterable[Any], fmt: Callable[[Any], str], limit: int = MAX_ROWS) -> List[str]:
+    items = list(items or [])
+    lines = [fmt(m) for m in items[:limit]]
+    if len(items) > limit:
+        lines.append(f"…… 共 {len(items)} 条，仅显示前 {limit} 条")
+    return lines or ["暂无数据"]
+
+
+def _richangyuche(d: Dict[str, Any]) -> str:
+    items = [m for m in d["items"] if m.get("en") and m.get("compare") != "过去"]
+    return "\n".join(["日常预测"] + _rows(items, lambda m: f"{m['date']}  大战：{m['war']}  战场：{m['battle']}", 7))
+
+
+def _qufuzhuangtai(d: Dict[str, Any]) -> str:
+    lines = ["区服状态"]
+    for title, key in (("无界区", "server_wj"), ("电信区", "server_dx"), ("双线区", "server_sx")):
+        servers = d.get(key) or []
+        lines.append(f"{title}：" + "  ".join(f"{m['server']}({m['status']})" for m in servers))
+    return "\n".join(lines)
+
+
+def _jinjia(d: Dict[str, Any]) -> str:
+    return "\n".join(["区服金价"] + _rows(
+        d["items"],
+        lambda m: f"{m['date']}  {m['server']}  万宝楼 {m.get('wanbaolou', '-')}  贴吧 {m.get('tieba', '-')}"
+    ))
+
+
+def _qiyuliebiao(d: Dict[str, Any]) -> str:
+    return "\n".join([f"{d.get('server', '')} 奇遇记录"] + _rows(
+        d["items"], lambda m: f"{m['time']}  {m['gameName']}  {m['adventureName']}"
+    ))
+
+
+def _juesheqiyu(d: Dict[str, Any]) -> str:
+    lines = []
+    for title, key in (("普通奇遇", "ptqy"), ("绝世奇遇", "jsqy"), ("宠物奇遇", "cwqy")):
+        items = d.get(key) or []
+        lines.append(f"{title}（{len(items)}）")
+        lines += _rows(items, lambda m: f"  {m['time']}  {m['event']}", 5)
+    return "\n".join(lines)
+
+
+def _wujia(d: Dict[str, Any]) -> str:
+    records = [item for group in d.get("list") or [] for item in group]
+    return "\n".join([f"{d.get('name', '')} 物价"] + _rows(
+        records, lambda m: f"{m['date']}  {m['server']}  {m['value']}"
+    ))
+
+
+def _jiaoyihang(d: Dict[str, Any]) -> str:
+    return "\n".join(["交易行"] + _rows(
+        d["list"], lambda m: f"{m['name']}  {m['unit_price']}  在售 {m['count']}  {m['created']}"
+    ))
+
+
+def _yanhuan(d: Dict[str, Any]) -> str:
+    return "\n".join(["烟花记录"] + _rows(
+        d["list"], lambda m: f"{m['time']}  {m['sender']} → {m['receive']}  {m['name']}"
+    ))
+
+
+def _dilujilu(d: Dict[str, Any]) -> str:
+    return "\n".join(["的卢记录"] + _rows(
+        d["list"],
+        lambda m: f"{m['server']}  {m['capture_role_name']}({m['capture_camp_name']})  "
+                  f"拍卖 {m['auction_amount']}  {m['auction_role_name']}"
+    ))
+
+
+def _tuanduizhaomu(d: Dict[str, Any]) -> str:
+    return "\n".join(["团队招募"] + _rows(
+        d["list"], lambda m: f"{m['activity']}  {m['leader']}  {m['number']}人  {m['content']}"
+    ))
+
+
+def _zhengyingpaimai(d: Dict[str, Any]) -> str:
+    return "\n".join(["阵营拍卖"] + _rows(
+        d["list"], lambda m: f"{m['time']}  {m['name']}  {m['role_name']}({m['camp_name']})  {m['amount']}"
+    ))
+
+
+def _xingxiashijian(d: Dict[str, Any]) -> str:
+    return "\n".join(["名望事件"] + _rows(
+        d["items"], lambda m: f"{m['time']}  {m['map']} {m['site']}  {m['desc']}"
+    ))
+
+
+def _zhanji(d: Dict[str, Any]) -> str:
+    p = (d.get("performance") or {}).get("3v3") or {}
+    head = (
+        f"{d['roleName']}  {d['serverName']}  {d.get('forceName', '')}\n"
+        f"3v3 分数 {p.get('mmr', '-')}  段位 {p.get('grade', '-')}  胜率 {p.get('winRate', '-')}  "
+        f"场次 {p.get('totalCount', '-')}"
+    )
+    return "\n".join([head] + _rows(
+        d.get("history"),
+        lambda m: f"{m['kungfu']}  {'胜' if m['won'] else '负'}  {m['mmr']}  {m['totalMmr']}",
+        5
+    ))
+
+
+FORMATTERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "richangyuche.html": _richangyuche,
+    "qufuzhuangtai.html": _qufuzhuangtai,
+    "jinjia.html": _jinjia,
+    "qiyuliebiao.html": _qiyuliebiao,
+    "juesheqiyu.html": _juesheqiyu,
+    "wujia.html": _wujia,
+    "jiaoyihang.html": _jiaoyihang,
+    "yanhuan.html": _yanhuan,
+    "dilujilu.html": _dilujilu,
+    "tuanduizhaomu.html": _tuanduizhaomu,
+    "zhengyingpaimai.html": _zhengyingpaimai,
+    "xingxiashijian.html": _xingxiashijian,
+    "zhanji.html": _zhanji,
+}
+
+
+def summarize(template: Optional[str], data: Dict[str, Any]) -> Optional[str]:
+    """
+    将模板数据转为文字摘要
+    :return: 文字摘要，模板不支持或数据结构异常时返回 None
+    """
+    func = FORMATTERS.get(template or "")
+    if func is None:
+        return None
+    try:
+        return func(data)
+    except (KeyError, TypeError, IndexError, ValueError) as e:
+        logger.error(f"生成文字摘要失败 {template}: {e}")
+        return None
@@ -1,9 +1,12 @@
+import os
 import json
+import time
 import shutil
+import hashlib
 import pathlib
 import asyncio
 from pathlib import Path
-from typing import Union
+from typing import Union, Dict, Any
 
 from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult, MessageChain
 from astrbot.api.star import Context, Star, register, StarTools
@@ -11,8 +14,13 @@ from astrbot.api import logger
 from astrbot.api import AstrBotConfig
 import astrbot.api.message_components as Comp
 
-from .core.jx3_service import JX3Service
+from .core.jx3_service import JX3Service, REQUIRED_TEMPLATES
+from .core.template_registry import templates
 from .core.async_task import AsyncTask
+from .core.rate_limit import RateLimitExceeded
+from .core.cache import TTLCache, make_render_key
+from .core.render_scheduler import RenderScheduler, RenderShed, RenderHealth
+from .core.text_fallback import summarize
 
 
 @register("astrbot_plugin_jx3", 
@@ -38,6 +46,46 @@ class Jx3ApiPlugin(Star):
         with open(self.api_file_path, 'r', encoding='utf-8') as f:
             self.api_config = json.load(f) 
 
+        # 渲染结果缓存
+        render_conf = self.conf.get("render_cache", {})
+        self.render_cache_enable = render_conf.get("enable", True)
+        self.render_cache_ttl = render_conf.get("ttl", 300)
+        self.render_cache = TTLCache(max_size=render_conf.get("max_size", 128))
+
+        # 渲染调度：限制并发，繁忙时优先保证轻量模板
+        sched_conf = self.conf.get("render_scheduler", {})
+        self.render_scheduler = RenderScheduler(
+            concurrency=sched_conf.get("concurrency", 2),
+            max_queue=sched_conf.get("max_queue", 20),
+            deadline=sched_conf.get("deadline", 15)
+        )
+        self.heavy_templates = set(sched_conf.get("heavy_templates", ["helps.html", "wujia.html"]))
+
+        # 渲染降级：渲染服务变慢或频繁出错时改为文字回复，恢复后自动切回图片
+        degrade_conf = self.conf.get("render_degrade", {})
+        self.render_degrade_enable = degrade_conf.get("enable", True)
+        self.render_health = RenderHealth(
+            window=degrade_conf.get("window", 20),
+            latency_threshold=degrade_conf.get("latency_threshold", 8),
+            error_threshold=degrade_conf.get("error_threshold", 0.5),
+            probe_interval=degrade_conf.get("probe_interval", 30)
+        )
+
+        # 预渲染：内容对所有人相同的图片提前渲染进渲染缓存
+        prerender_conf = self.conf.get("prerender", {})
+        self.prerender_enable = prerender_conf.get("enable", True) and self.render_cache_enable
+        self.prerender_interval = prerender_conf.get("interval", 120)
+        self.prerender_reset_time = prerender_conf.get("reset_time", "07:00")
+        # 文转图服务保存图片的时间，数据不变时在此期限内复用同一图片地址
+        self.prerender_url_retention = prerender_conf.get("url_retention", 1800)
+        # 方法名 -> (渲染键, 图片地址, 渲染时间)
+        self._prerendered: Dict[str, Any] = {}
+        self._prerender_lock = asyncio.Lock()
+
+        # 帮助图片内容固定，渲染一次后保存在数据目录
+        self._help_lock = asyncio.Lock()
+        self._help_task = None
+
         # 初始化数据
         self.server = self.conf.get("server", "梦江南")
         logger.info(f"配置加载默认服务器：{self.server}")
@@ -60,10 +108,26 @@ class Jx3ApiPlugin(Star):
             logger.critical(f"插件初始化失败：{e}")
             raise
 
+        # --- 一次性加载并校验全部模板 ---
+        try:
+            templates.watch = self.conf.get("template_hot_reload", False)
+            build_conf = self.conf.get("template_build", {})
+            templates.build = build_conf.get("enable", True)
+            templates.budget_bytes = build_conf.get("budget_kb", 8) * 1024
+            await loop.run_in_executor(None, templates.load_all, REQUIRED_TEMPLATES)
+        except (FileNotFoundError, ValueError) as e:
+            logger.critical(f"模板加载失败：{e}")
+            raise
+
         try:
             self.jx3fun = JX3Service(self.api_config, self.conf)
+            await self.jx3fun.warm_cache()
+            self.jx3fun.start_prefetch()
             self.at = AsyncTask(self.context, self.conf, self.jx3fun)
             await self.at.init_tasks()
+            if self.prerender_enable:
+                self.at.add_prerender_job(self.prerender, self.prerender_interval, self.prerender_reset_time)
+            self._help_task = asyncio.create_task(self._build_help_image())
         except Exception as e:
             if hasattr(self, "at"):
                 await self.at.destroy()
@@ -107,6 +171,160 @@ class Jx3ApiPlugin(Star):
         return target_file_path
 
     
+    async def render_image(self, data: Dict[str, Any], force: bool = False, background: bool = False) -> str:
+        """
+        渲染模板为图片
+        相同模板 + 相同数据在有效期内直接返回上次的渲染结果，上游数据未变化时不再重复渲染
+        :param force: 忽略已有缓存重新渲染
+        :param background: 后台渲染，排在所有用户请求之后
+        """
+        if not self.render_cache_enable:
+            return await self._schedule_render(data, background)
+
+        key = make_render_key(data["temp"], data["data"])
+        if not force:
+            url = await self.render_cache.get(key)
+            if url:
+                logger.debug("命中渲染缓存")
+                return url
+
+        url = await self._schedule_render(data, background)
+        await self.render_cache.set(key, url, self.render_cache_ttl)
+        return url
+
+
+    async def _schedule_render(self, data: Dict[str, Any], background: bool = False, return_url: bool = True) -> str:
+        """
+        经渲染调度器执行渲染，重量级模板优先级较低
+        :param return_url: False 时返回下载到本地的图片路径
+        :raises RenderShed: 渲染队列繁忙
+        """
+        name = templates.name_of(data["temp"])
+        if background:
+            priority = 2
+        else:
+            priority = 1 if name in self.heavy_templates else 0
+
+        if self.render_degrade_enable and not self.render_health.should_render():
+            raise RenderShed("渲染服务降级中")
+
+        async def _render() -> str:
+            start = time.monotonic()
+            try:
+                url = await self.html_render(data["temp"], data["data"], return_url=return_url, options={})
+            except Exception:
+                self.render_health.record(time.monotonic() - start, False)
+                raise
+            self.render_health.record(time.monotonic() - start, True)
+            return url
+
+        try:
+            return await self.render_scheduler.run(_render, priority=priority)
+        except RenderShed as e:
+            logger.warning(f"渲染请求被丢弃 {name}: {e}")
+            raise
+
+
+    async def image_reply(self, event: AstrMessageEvent, data: Dict[str, Any]) -> MessageEventResult:
+        """
+        图片回复，渲染繁忙或降级时改为文字摘要
+        :raises RenderShed: 无法渲染且该模板没有文字摘要
+        """
+        try:
+            url = await self.render_image(data)
+        except Exception as e:
+            text = summarize(templates.name_of(data["temp"]), data["data"])
+            if text is None:
+                raise
+            if not isinstance(e, RenderShed):
+                logger.error(f"图片渲染失败，改为文字回复: {e}")
+            return event.plain_result(text)
+        return event.image_result(url)
+
+
+    async def help_image(self, data: Dict[str, Any], background: bool = False) -> str:
+        """
+        帮助图片路径
+        以模板内容哈希命名保存在数据目录，模板不变时直接复用，模板变化后重新渲染
+        """
+        digest = hashlib.sha1(data["temp"].encode("utf-8")).hexdigest()[:16]
+        prefix = f"help_{digest}"
+
+        async with self._help_lock:
+            for path in self.local_data_dir.glob(f"{prefix}.*"):
+                if path.suffix != ".tmp":
+                    return str(path)
+
+            rendered = Path(await self._schedule_render(data, background=background, return_url=False))
+            target = self.local_data_dir / f"{prefix}{rendered.suffix or '.png'}"
+            await asyncio.get_running_loop().run_in_executor(None, self._save_help_image, rendered, target)
+
+            logger.info(f"帮助图片已生成: {target}")
+            return str(target)
+
+
+    def _save_help_image(self, rendered: Path, target: Path):
+        """原子写入帮助图片，并清理旧模板生成的图片"""
+        tmp_path = target.with_suffix(target.suffix + ".tmp")
+        shutil.copyfile(rendered, tmp_path)
+        os.replace(tmp_path, target)
+
+        for old in target.parent.glob("help_*"):
+            if old != target:
+                old.unlink(missing_ok=True)
+
+
+    async def _build_help_image(self):
+        """插件启动后在后台生成帮助图片"""
+        try:
+            data = await self.jx3fun.helps()
+            if data["code"] == 200:
+                await self.help_image(data, background=True)
+        except Exception as e:
+            logger.warning(f"启动时生成帮助图片失败，将在首次查询时生成: {e}")
+
+
+    async def prerender(self, reset: bool = False):
+        """
+        预渲染日常预测、区服状态
+        1. 区服状态每次跳过接口缓存取最新数据；日常预测只在每日重置时跳过缓存。
+        2. 数据变化或图片地址即将超过保存期限时才重新渲染，否则只续期渲染缓存。
+        :param reset: 每日重置时间触发
+        """
+        if self._prerender_lock.locked():
+            return
+
+        async with self._prerender_lock:
+            for name, fresh in (("richangyuche", reset), ("zhuangtai", True)):
+                try:
+                    data = await getattr(self.jx3fun, name)(fresh=fresh)
+                    if data["code"] != 200:
+                        continue
+
+                    key = make_render_key(data["temp"], data["data"])
+                    last = self._prerendered.get(name)
+                    # 保证下个周期之前图片地址仍然有效
+                    reuse_before = self.prerender_url_retention - self.prerender_interval
+                    if last and last[0] == key and time.monotonic() - last[2] < reuse_before:
+                        await self.render_cache.set(key, last[1], self.render_cache_ttl)
+                        continue
+
+                    url = await self.render_image(data, force=True, background=True)
+                    self._prerendered[name] = (key, url, time.monotonic())
+                    logger.debug(f"预渲染完成: {name}")
+                except (RateLimitExceeded, RenderShed) as e:
+                    logger.warning(f"预渲染 {name} 跳过: {e}")
+                except Exception as e:
+                    logger.error(f"预渲染 {name} 失败: {e}")
+
+
+    def image_component(self, path_or_url: str) -> Comp.Image:
+        """本地缓存路径或远程 URL 转为图片消息组件"""
+        if path_or_url.startswith(("http://", "https://")):
+            return Comp.Image.fromURL(path_or_url)
+        return Comp.Image.fromFileSystem(path_or_url)
+
+    
     def serverdefault(self,server):
         """加载配置默认服务器"""
         if server == "":
@@ -126,13 +344,14 @@ class Jx3ApiPlugin(Star):
         try:
             
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield event.image_result(await self.help_image(data))
             else:
                 yield event.plain_result(data["msg"])
+        except RenderShed:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
-            yield event.plain_result("猪脑过载，请稍后再试") 
+            yield event.plain_result("猪脑过载，请稍后再试")
 
 
     @jx3.command("日常")
@@ -145,6 +364,8 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -156,11 +377,12 @@ class Jx3ApiPlugin(Star):
         try:
             data= await self.jx3fun.richangyuche()
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -172,11 +394,12 @@ class Jx3ApiPlugin(Star):
         try:
             data= await self.jx3fun.xingxiashijian(name)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -192,6 +415,8 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -203,11 +428,12 @@ class Jx3ApiPlugin(Star):
         try:
             data= await self.jx3fun.zhuangtai()
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -223,6 +449,8 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
@@ -238,6 +466,8 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
@@ -253,22 +483,25 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")   
 
 
     @jx3.command("区服奇遇")
-    async def jx3_qufuqiyu(self, event: AstrMessageEvent,adventureName: str = "阴阳两界", server: str = ""):
-        """剑三 区服奇遇 奇遇名称 服务器"""
+    async def jx3_qufuqiyu(self, event: AstrMessageEvent,adventureName: str = "阴阳两界", server: str = "", page: int = 1):
+        """剑三 区服奇遇 奇遇名称 服务器 页码"""
         try:
-            data= await self.jx3fun.qiyu(adventureName,self.serverdefault(server))
+            data= await self.jx3fun.qiyu(adventureName,self.serverdefault(server), page)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
@@ -280,11 +513,12 @@ class Jx3ApiPlugin(Star):
         try:
             data= await self.jx3fun.jinjia( self.serverdefault(server),limit)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -296,28 +530,30 @@ class Jx3ApiPlugin(Star):
         try:
             data=await self.jx3fun.wujia(Name, self.serverdefault(server))
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
 
 
     @jx3.command("交易行")
-    async def jx3_jiaoyihang(self, event: AstrMessageEvent,Name: str = "守缺式",server: str = ""):
-        """剑三 交易行 物品名称 服务器"""     
+    async def jx3_jiaoyihang(self, event: AstrMessageEvent,Name: str = "守缺式",server: str = "", page: int = 1):
+        """剑三 交易行 物品名称 服务器 页码"""     
         try:
-            data=await self.jx3fun.jiaoyihang(Name, self.serverdefault(server))
+            data=await self.jx3fun.jiaoyihang(Name, self.serverdefault(server), page)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
                 
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
@@ -331,12 +567,14 @@ class Jx3ApiPlugin(Star):
             if data["code"] == 200:
                 chain = [
                     Comp.Plain(f"{data['data']['serverName']}--{data['data']['roleName']} \n"),
-                    Comp.Image.fromURL(f"{data['data']['showAvatar']}")
+                    self.image_component(data['data']['showAvatarPath'])
                 ]
                 yield event.chain_result(chain)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")  
@@ -351,45 +589,49 @@ class Jx3ApiPlugin(Star):
                 chain = [
                     
                     Comp.Plain(f"{data['data']['serverName']}--{data['data']['roleName']} \n"),
-                    Comp.Image.fromURL(f"{data['data']['showAvatar']}"),
+                    self.image_component(data['data']['showAvatarPath']),
                     Comp.Plain(f"{force}--{body} \n")
                 ]
                 yield event.chain_result(chain)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")  
 
 
     @jx3.command("烟花")
-    async def jx3_yanhuachaxun(self, event: AstrMessageEvent,name: str = "飞翔大野猪", server: str = ""):
-        """剑三 烟花 角色 服务器"""
+    async def jx3_yanhuachaxun(self, event: AstrMessageEvent,name: str = "飞翔大野猪", server: str = "", page: int = 1):
+        """剑三 烟花 角色 服务器 页码"""
         try:
-            data= await self.jx3fun.yanhuachaxun( self.serverdefault(server),name)
+            data= await self.jx3fun.yanhuachaxun( self.serverdefault(server),name, page)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")  
 
 
     @jx3.command("的卢")
-    async def jx3_dilujilu(self, event: AstrMessageEvent,server: str = ""):
-        """剑三 的卢 服务器"""
+    async def jx3_dilujilu(self, event: AstrMessageEvent,server: str = "", page: int = 1):
+        """剑三 的卢 服务器 页码"""
         try:
-            data= await self.jx3fun.dilujilu( self.serverdefault(server))
+            data= await self.jx3fun.dilujilu( self.serverdefault(server), page)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")  
@@ -401,11 +643,12 @@ class Jx3ApiPlugin(Star):
         try:
             data= await self.jx3fun.tuanduizhaomu( self.serverdefault(server),keyword)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
@@ -417,11 +660,12 @@ class Jx3ApiPlugin(Star):
         try:
             data= await self.jx3fun.zhanji(name, self.serverdefault(server),mode)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
@@ -433,27 +677,29 @@ class Jx3ApiPlugin(Star):
         try:
             data= await self.jx3fun.juesheqiyu(name, self.serverdefault(server))
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
 
 
     @jx3.command("阵营拍卖")
-    async def jx3_zhengyingpaimai(self, event: AstrMessageEvent,name: str = "玄晶", server: str = ""):
-        """剑三 阵营拍卖 物品名称 服务器"""
+    async def jx3_zhengyingpaimai(self, event: AstrMessageEvent,name: str = "玄晶", server: str = "", page: int = 1):
+        """剑三 阵营拍卖 物品名称 服务器 页码"""
         try:
-            data= await self.jx3fun.zhengyingpaimai( self.serverdefault(server), name)
+            data= await self.jx3fun.zhengyingpaimai( self.serverdefault(server), name, page)
             if data["code"] == 200:
-                url = await self.html_render(data["temp"], data["data"], options={})
-                yield event.image_result(url)
+                yield await self.image_reply(event, data)
             else:
                 yield event.plain_result(data["msg"])
             return
+        except (RateLimitExceeded, RenderShed):
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试") 
@@ -469,6 +715,8 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -484,6 +732,8 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -499,6 +749,8 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -514,6 +766,8 @@ class Jx3ApiPlugin(Star):
             else:
                 yield event.plain_result(data["msg"])
             return
+        except RateLimitExceeded:
+            yield event.plain_result("查询的人太多啦，请稍后再试")
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
             yield event.plain_result("猪脑过载，请稍后再试")
@@ -533,8 +787,32 @@ class Jx3ApiPlugin(Star):
         yield event.plain_result(return_msg) 
 
 
+    @jx3.command("运行状态")
+    async def jx3_yunxingzhuangtai(self, event: AstrMessageEvent):
+        """剑三 运行状态"""
+        render = self.render_cache.stats()
+        sched = self.render_scheduler.stats()
+        health = self.render_health.stats()
+        reports = templates.report().values()
+        tmpl_before = sum(r["source_bytes"] for r in reports)
+        tmpl_after = sum(r["bytes"] for r in reports)
+        yield event.plain_result(
+            f"{self.jx3fun.runtime_info()}\n"
+            f"渲染缓存：{render['size']}/{render['max_size']}  命中 {render['hits']}  未命中 {render['misses']}\n"
+            f"渲染队列：进行中 {sched['running']}/{sched['concurrency']}  排队 {sched['queued']}/{sched['max_queue']}  "
+            f"平均等待 {sched['avg_wait']}s  最长等待 {sched['max_wait']}s  平均耗时 {sched['avg_render']}s  丢弃 {sched['shed']}\n"
+            f"渲染健康：{'降级为文字' if health['degraded'] else '正常'}  平均耗时 {health['latency']}s  "
+            f"失败率 {health['error_rate']:.0%}  累计降级 {health['degraded_count']} 次\n"
+            f"模板体积：{tmpl_before} -> {tmpl_after} 字节"
+        )
+
+
     async def terminate(self):
         """可选择实现异步的插件销毁方法，当插件被卸载/停用时会调用。"""
+        if self._help_task:
+            self._help_task.cancel()
+            self._help_task = None
+
         if self.at:
             await self.at.destroy()
             self.at = None